@@ -1,14 +1,20 @@
+import numpy.typing as npt
+import numpy as np
 import eval7
 
 from typing import cast
 from typing import Optional
 from functools import lru_cache
-import pickle
-import math
+import itertools
+import hashlib
+import pathlib
 
 from zerosum.game import InfoSet as PInfoSet
 from zerosum.abstraction import algebraic
-from zerosum.pkr.abstraction.hands import equity, potential, emd
+from zerosum.pkr.abstraction.hands import equity, potential, cdfs, nearest
+from zerosum.pkr.abstraction.buckets import bucketing
+from zerosum.pkr.abstraction import artifacts
+from zerosum.pkr.abstraction.isomorphism import index as iso, unindex
 from zerosum.pkr.game import InfoSet, RaiseHalfPot, Raise75Pot, RaisePot, Allin, Bet
 
 
@@ -17,6 +23,7 @@ _cards = eval7.Deck().cards
 
 
 MAXITER = 1000
+STREETS = 49  # at most 48 community cards
 
 
 @algebraic
@@ -26,7 +33,7 @@ def lastaction(infoset: PInfoSet):
         return infoset.history[-1]
 
 
-@algebraic
+@algebraic(domain=(None, False, True))
 def run(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     if len(infoset.community) >= 5:
@@ -34,13 +41,13 @@ def run(infoset: PInfoSet):
         return _cards[card].suit in (0, 3)
 
 
-@algebraic
+@algebraic(domain=range(STREETS))
 def street(infoset: PInfoSet):
     return len(cast(InfoSet, infoset).community)
 
 
 def linearcost(acc: int):
-    @algebraic
+    @algebraic(domain=range(acc + 1))
     def linearcost(infoset: PInfoSet):
         infoset = cast(InfoSet, infoset)
         cost = abs(infoset.pips[0] - infoset.pips[1])
@@ -50,13 +57,13 @@ def linearcost(acc: int):
     return linearcost
 
 
-@algebraic
+@algebraic(domain=(0, 1))
 def player(infoset: PInfoSet):
     return cast(InfoSet, infoset).player
 
 
 def linearpot(acc: int):
-    @algebraic
+    @algebraic(domain=range(acc + 1))
     def linearpot(infoset: PInfoSet):
         infoset = cast(InfoSet, infoset)
         pot = infoset.pot + sum(infoset.pips)
@@ -68,8 +75,14 @@ def linearpot(acc: int):
 _bet_action = (RaiseHalfPot, RaisePot, Allin, Bet)
 
 
+def _subsets(bets: tuple) -> list[tuple]:
+    # every bet abstraction output, bets keep their order
+    n = len(bets)
+    return [tuple(b for i, b in enumerate(bets) if m >> i & 1) for m in range(2 ** n)]
+
+
 def linearodds(acc: int):
-    @algebraic
+    @algebraic(domain=(None, *range(acc + 1)))
     def linearodds(infoset: PInfoSet):
         infoset = cast(InfoSet, infoset)
 
@@ -83,7 +96,7 @@ def linearodds(acc: int):
     return linearodds
 
 
-@algebraic
+@algebraic(domain=_subsets((RaiseHalfPot(), RaisePot(), Allin())))
 def basic(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     lb, ub = infoset._bounds()
@@ -102,7 +115,9 @@ def basic(infoset: PInfoSet):
     return tuple(bets)
 
 
-@algebraic
+@algebraic(
+    domain=_subsets((Bet(2), RaiseHalfPot(), Raise75Pot(), RaisePot(), Allin()))
+)
 def advanced(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     lb, ub = infoset._bounds()
@@ -125,32 +140,28 @@ def advanced(infoset: PInfoSet):
     return tuple(bets)
 
 
-@lru_cache(maxsize=2 ** 10)
-def _equity(hand: tuple[Card, Card], community: tuple[Card, ...], d: int, maxiter: int):
-    return equity(hand, community, d, maxiter)
-
+def _cards_of(street: int, index: int) -> tuple[tuple[Card, Card], tuple[Card, ...]]:
+    hand, community = unindex(street, index)
+    return (_cards[hand[0]], _cards[hand[1]]), tuple(_cards[i] for i in community)
 
-def _equity_abstraction(street, centroids, dimension=10, maxiter=MAXITER):
-    @algebraic
-    def _equity_abstraction(infoset: PInfoSet):
-        infoset = cast(InfoSet, infoset)
 
-        if len(infoset.community) != street:
-            return -1
+@lru_cache(maxsize=2 ** 16)
+def _equity(street: int, index: int, d: int, maxiter: int):
+    # keyed on the isomorphism index, isomorphic hands share their histogram
+    hand, community = _cards_of(street, index)
+    return equity(hand, community, d, maxiter)
 
-        hand = tuple(_cards[i] for i in infoset.hand)
-        community = tuple(_cards[i] for i in infoset.community)
-        h = _equity(hand, community, dimension, maxiter)
 
-        mi, md = 0, math.inf
-        for i, c in enumerate(centroids):
-            d = emd(h, c)
-            if d < md:
-                mi, md = i, d
+def _equity_abstraction(street, centroids, dimension=10, maxiter=MAXITER, path=None):
+    centroids = cdfs(centroids)
 
+    def compute(hand: tuple[int, ...], community: tuple[int, ...]) -> int:
+        h = _equity(street, iso(hand, community), dimension, maxiter)
+        mi, _ = nearest(h, centroids)
         return mi
 
-    return _equity_abstraction
+    path = path or f"buckets/equity-{street}-{len(centroids)}-{dimension}"
+    return bucketing(street, len(centroids), compute, path, "_equity_abstraction")
 
 
 def equities(
@@ -164,13 +175,13 @@ def equities(
         if acc == 0:
             continue
 
-        path = f"centroids/{street}-{acc}.pkl"
+        path = f"centroids/{street}-{acc}"
         if dimension is not None:
-            path = f"centroids/{street}-{acc}-{dimension}.pkl"
-        with open(path, "rb") as f:
-            centroids = pickle.load(f)
+            path = f"centroids/{street}-{acc}-{dimension}"
+        centroids = artifacts.centroids(path)
 
-        a = _equity_abstraction(street, centroids, dimension or 10, maxiter)
+        buckets = "buckets/" + path
+        a = _equity_abstraction(street, centroids, dimension or 10, maxiter, buckets)
         abstractions.append(a)
 
     a = abstractions.pop()
@@ -180,38 +191,22 @@ def equities(
     return a
 
 
-@lru_cache(maxsize=2 ** 10)
-def _potential(
-    hand: tuple[Card, Card],
-    community: tuple[Card, ...],
-    d: int,
-    maxiter: int,
-    future: int,
-):
+@lru_cache(maxsize=2 ** 16)
+def _potential(street: int, index: int, d: int, maxiter: int, future: int):
+    hand, community = _cards_of(street, index)
     return potential(hand, community, d, maxiter, future)
 
 
-def _potential_abstraction(street, centroids, future, dimension):
-    @algebraic
-    def _potential_abstraction(infoset: PInfoSet):
-        infoset = cast(InfoSet, infoset)
-
-        if len(infoset.community) != street:
-            return -1
-
-        hand = tuple(_cards[i] for i in infoset.hand)
-        community = tuple(_cards[i] for i in infoset.community)
-        h = _potential(hand, community, dimension, MAXITER, future)
-
-        mi, md = 0, math.inf
-        for i, c in enumerate(centroids):
-            d = emd(h, c)
-            if d < md:
-                mi, md = i, d
+def _potential_abstraction(street, centroids, future, dimension, path=None):
+    centroids = cdfs(centroids)
 
+    def compute(hand: tuple[int, ...], community: tuple[int, ...]) -> int:
+        h = _potential(street, iso(hand, community), dimension, MAXITER, future)
+        mi, _ = nearest(h, centroids)
         return mi
 
-    return _potential_abstraction
+    path = path or f"buckets/potential-{street}-f{future}-{len(centroids)}-{dimension}"
+    return bucketing(street, len(centroids), compute, path, "_potential_abstraction")
 
 
 def potentials(accs: tuple[int, ...], future: int, dimension: Optional[int] = None):
@@ -221,13 +216,13 @@ def potentials(accs: tuple[int, ...], future: int, dimension: Optional[int] = No
         if acc == 0:
             continue
 
-        path = f"potentials/{street}-f{future}-{acc}.pkl"
+        path = f"potentials/{street}-f{future}-{acc}"
         if dimension is not None:
-            path = f"potentials/{street}-f{future}-{acc}-{dimension}.pkl"
-        with open(path, "rb") as f:
-            centroids = pickle.load(f)
+            path = f"potentials/{street}-f{future}-{acc}-{dimension}"
+        centroids = artifacts.centroids(path)
 
-        a = _potential_abstraction(street, centroids, future, dimension or 10)
+        buckets = "buckets/" + path
+        a = _potential_abstraction(street, centroids, future, dimension or 10, buckets)
         abstractions.append(a)
 
     a = abstractions.pop()
@@ -241,10 +236,39 @@ _ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "T", "J", "Q", "K", "A"]
 
 from ._preflop import clusters
 
-_reverse = {}
-for i, cluster in enumerate(clusters):
-    for hand in cluster:
-        _reverse[hand] = i
+# the preflop bucket of every hole card pair, in `itertools.combinations`
+# order, generated from `clusters` on first use into `_preflop.npz` next to
+# this file. it is generated again when `clusters` change
+_table = pathlib.Path(__file__).with_name("_preflop.npz")
+
+
+def _pair(i: int, j: int) -> int:
+    i, j = min(i, j), max(i, j)
+    return i * (103 - i) // 2 + j - i - 1
+
+
+@lru_cache(maxsize=None)
+def preflops() -> npt.NDArray[np.int16]:
+    source = hashlib.sha1(repr(clusters).encode()).hexdigest()
+    if _table.exists():
+        with np.load(_table) as table:
+            if str(table["source"]) == source:
+                return table["buckets"]
+
+    reverse = {hand: i for i, cluster in enumerate(clusters) for hand in cluster}
+    buckets = np.array(
+        [
+            reverse[_represent((_cards[i], _cards[j]))]
+            for i, j in itertools.combinations(range(52), 2)
+        ],
+        dtype=np.int16,
+    )
+
+    try:
+        np.savez(_table, buckets=buckets, source=source)
+    except OSError:
+        pass  # read only install, generated every time
+    return buckets
 
 
 def _represent(hand: tuple[Card, Card]):
@@ -257,7 +281,7 @@ def _represent(hand: tuple[Card, Card]):
     return f"{_ranks[ri]}{_ranks[rj]}{suited}"
 
 
-@algebraic
+@algebraic(domain=(None, False, True))
 def colorsuited(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     ci, cj = infoset.hand
@@ -268,12 +292,10 @@ def colorsuited(infoset: PInfoSet):
     return None
 
 
-@algebraic
+@algebraic(domain=range(-1, len(clusters)))
 def preflop(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     if len(infoset.community) != 0:
         return -1
 
-    ci, cj = infoset.hand
-    hand = _cards[ci], _cards[cj]
-    return _reverse[_represent(hand)]
+    return int(preflops()[_pair(*infoset.hand)])
@@ -1,40 +1,31 @@
 import numpy as np
 import eval7
 
-from typing import cast
 from functools import lru_cache
-import pickle
 
-from zerosum.game import InfoSet as PInfoSet
-from zerosum.pkr.game import InfoSet
-from zerosum.abstraction import algebraic
+from zerosum.pkr.abstraction.buckets import bucketing
+from zerosum.pkr.abstraction import artifacts
+from zerosum.pkr.abstraction.isomorphism import index as iso, unindex
 from zerosum.pkr.abstraction.ochs import ochs
 
 
-Card = eval7.Card
 _cards = eval7.Deck().cards
 
 
-@lru_cache(maxsize=2 ** 10)
-def _ochs(hand: tuple[Card, Card], community: tuple[Card, ...]):
-    return ochs(hand, community)
+@lru_cache(maxsize=2 ** 16)
+def _ochs(street: int, index: int):
+    # keyed on the isomorphism index, isomorphic hands share their histogram
+    hand, community = unindex(street, index)
+    return ochs(tuple(_cards[i] for i in hand), tuple(_cards[i] for i in community))
 
 
-def villain(street, centroids):
-    @algebraic
-    def villain(infoset: PInfoSet):
-        infoset = cast(InfoSet, infoset)
+def villain(street, centroids, path=None):
+    def compute(hand: tuple[int, ...], community: tuple[int, ...]) -> int:
+        h = _ochs(street, iso(hand, community))
+        return int(np.linalg.norm(centroids - h, axis=1).argmin())
 
-        if len(infoset.community) != street:
-            return -1
-
-        hand = tuple(_cards[i] for i in infoset.hand)
-        community = tuple(_cards[i] for i in infoset.community)
-        h = _ochs(hand, community)
-
-        return np.linalg.norm(centroids - h, axis=1).argmin()
-
-    return villain
+    path = path or f"buckets/villain-{street}-{len(centroids)}"
+    return bucketing(street, len(centroids), compute, path, "villain")
 
 
 def villains(accs: tuple[int, ...]):
@@ -44,11 +35,10 @@ def villains(accs: tuple[int, ...]):
         if acc == 0:
             continue
 
-        path = f"ochs/{street}-{acc}.pkl"
-        with open(path, "rb") as f:
-            centroids = pickle.load(f)
+        path = f"ochs/{street}-{acc}"
+        centroids = artifacts.centroids(path)
 
-        a = villain(street, centroids)
+        a = villain(street, centroids, "buckets/" + path)
         abstractions.append(a)
 
     a = abstractions.pop()
@@ -0,0 +1,230 @@
+import numpy as np
+
+from typing import Callable
+import importlib
+import argparse
+import timeit
+import random
+import math
+
+from zerosum.pkr.abstraction.hands import emd, cdfs, nearest
+from zerosum.pkr.abstraction import engine
+from zerosum.pkr.abstraction.kmeans import kmeans, _lloyd
+from zerosum.algorithms.matching import matching, matchings
+from zerosum.algorithms.table import Table
+from zerosum.algorithms.tree import TreeCFR
+from zerosum.algorithms.cfrplus import CFRP
+from zerosum.algorithms.cfr import CFR
+from zerosum.algorithms.escfr import ESCFR
+from zerosum.algorithms.lcfr import ESLCFR
+from zerosum.bargain import offer, sealed
+from zerosum.kuhn.game import Kuhn
+from zerosum.rps.game import RPS
+import eval7
+
+
+GAMES = {"kuhn": Kuhn, "rps": RPS, "offer": offer.Game, "sealed": sealed.Game}
+
+
+def _timeit(stmt: Callable[[], object], number: int) -> float:
+    # best of a few repeats, in seconds per call
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number
+
+
+def _report(name: str, seconds: float, baseline: float):
+    print(f"{name:<32}{seconds * 1e9:>10.0f} ns{baseline / seconds:>8.1f}x")
+
+
+def matching_(args: argparse.Namespace):
+    rng = np.random.default_rng(0)
+    rows = rng.normal(size=(args.rows, args.actions))
+
+    # the previous implementation, on dict rows
+    def legacy(regrets: list[float]):
+        regrets = [max(0, r) for r in regrets]
+        denom = sum(regrets)
+
+        if denom > 0:
+            for i, r in enumerate(regrets):
+                regrets[i] = r / denom
+            return regrets
+
+        return [1 / len(regrets)] * len(regrets)
+
+    dicts = [{a: r for a, r in enumerate(row)} for row in rows]
+    table: Table = Table()
+    for i, row in enumerate(dicts):
+        table[i] = row
+
+    R, T = dicts[0], table[0]
+    matching(T.values())  # compile
+
+    n = args.number
+    base = _timeit(lambda: legacy(list(R.values())), n)
+    _report("legacy (dict row)", base, base)
+    _report("matching (dict row)", _timeit(lambda: matching(R.values()), n), base)
+    _report("matching (table row)", _timeit(lambda: matching(T.values()), n), base)
+
+    offsets, lengths = table.spans()
+    matchings(table._data, offsets, lengths)  # compile
+    batched = _timeit(lambda: matchings(table._data, offsets, lengths), 10)
+    _report(f"matchings (per row, {args.rows})", batched / args.rows, base)
+
+
+def tree(args: argparse.Namespace):
+    game = GAMES[args.game]
+
+    for name, recursive, compiled in [
+        ("cfr", CFR(), TreeCFR()),
+        ("cfr+", CFRP(), TreeCFR(plus=True)),
+    ]:
+        compiled._run_iteration(game)  # compile
+
+        n = args.number
+        base = _timeit(lambda: recursive._run_iteration(game), n)
+        _report(f"{name} (recursive)", base, base)
+        seconds = _timeit(lambda: compiled._run_iteration(game), n)
+        _report(f"{name} (tree)", seconds, base)
+
+
+def walk(args: argparse.Namespace):
+    if args.blood is None:
+        game = Kuhn
+    else:
+        game = importlib.import_module(f".{args.blood}", package="blood")
+        game = game.TrainingAbstraction
+
+    for name, recursive, iterative in [
+        ("escfr", ESCFR(), ESCFR(iterative=True)),
+        ("lcfr", ESLCFR(args.number), ESLCFR(args.number, iterative=True)),
+    ]:
+        # both follow the same trajectory from the same seed
+        n = args.number
+        random.seed(0)
+        base = _timeit(lambda: recursive._run_iteration(game), n)
+        _report(f"{name} (recursive)", base, base)
+        random.seed(0)
+        seconds = _timeit(lambda: iterative._run_iteration(game), n)
+        _report(f"{name} (stack)", seconds, base)
+
+
+def nearest_(args: argparse.Namespace):
+    rng = np.random.default_rng(0)
+    centroids = rng.dirichlet(np.ones(args.dimension), size=args.centroids)
+    hs = rng.dirichlet(np.ones(args.dimension), size=1000)
+
+    # the previous implementation, one emd per centroid
+    def legacy(h):
+        mi, md = 0, math.inf
+        for i, c in enumerate(centroids):
+            d = emd(h, c)
+            if d < md:
+                mi, md = i, d
+        return mi
+
+    F = cdfs(centroids)
+    legacy(hs[0]), nearest(hs[0], F)  # compile
+
+    n = args.number
+    base = _timeit(lambda: [legacy(h) for h in hs], n) / len(hs)
+    _report("legacy (emd per centroid)", base, base)
+    seconds = _timeit(lambda: [nearest(h, F) for h in hs], n) / len(hs)
+    _report("nearest (cdfs)", seconds, base)
+
+
+def hs(args: argparse.Namespace):
+    rng = random.Random(0)
+    deals = [rng.sample(range(52), 2 + args.street) for _ in range(args.hands)]
+    cards = eval7.Deck().cards
+
+    # the previous implementation, two eval7 evaluations per sample
+    def legacy(hand, community):
+        deck = [card for card in cards if card not in hand and card not in community]
+
+        score = 0
+        for _ in range(args.maxiter):
+            rng.shuffle(deck)
+            other, board, i = tuple(deck[:2]), list(community), 2
+            while len(board) < 5 or board[-1].suit in (1, 2):
+                board.append(deck[i])
+                i += 1
+
+            us = eval7.evaluate(hand + tuple(board))
+            op = eval7.evaluate(other + tuple(board))
+            score += 2 if us > op else 1 if us == op else 0
+        return score / (2 * args.maxiter)
+
+    hands = [tuple(cards[i] for i in deal[:2]) for deal in deals]
+    boards = [tuple(cards[i] for i in deal[2:]) for deal in deals]
+    batch = engine.cards(deals)
+    engine.hs(batch[:1, :2], batch[:1, 2:], 1)  # compile
+
+    samples = len(deals) * args.maxiter
+    base = _timeit(lambda: [legacy(h, b) for h, b in zip(hands, boards)], 1)
+    _report("legacy (eval7, per sample)", base / samples, base / samples)
+    h, b = batch[:, :2], batch[:, 2:]
+    seconds = _timeit(lambda: engine.hs(h, b, args.maxiter, exact=0), 1)
+    _report("engine (batched, per sample)", seconds / samples, base / samples)
+    # enumerated on complete boards, past the river with a black last card
+    seconds = _timeit(lambda: engine.hs(h, b, args.maxiter), 1)
+    _report("engine (exact, per sample)", seconds / samples, base / samples)
+
+
+def kmeans_(args: argparse.Namespace):
+    rng = np.random.default_rng(0)
+    vecs = rng.dirichlet(np.ones(args.dimension), size=args.points)
+    seeds = vecs[rng.choice(len(vecs), args.clusters, replace=False)]
+    kmeans(vecs[:100], seeds[:2].copy(), 1)  # compile
+
+    # the previous implementation, every distance on every iteration
+    base = _timeit(lambda: _lloyd(vecs, seeds.copy(), args.maxiter, emd), 1)
+    _report("lloyd (per run)", base, base)
+    seconds = _timeit(lambda: kmeans(vecs, seeds.copy(), args.maxiter), 1)
+    _report("hamerly (per run)", seconds, base)
+
+
+def main():
+    parser = argparse.ArgumentParser("bench", description="microbenchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("matching", help="regret matching kernels")
+    command.add_argument("--actions", type=int, default=4)
+    command.add_argument("--rows", type=int, default=100_000)
+    command.add_argument("-n", "--number", type=int, default=100_000)
+    command.set_defaults(run=matching_)
+
+    command = commands.add_parser("nearest", help="nearest centroid in emd")
+    command.add_argument("--centroids", type=int, default=40)
+    command.add_argument("--dimension", type=int, default=30)
+    command.add_argument("-n", "--number", type=int, default=10)
+    command.set_defaults(run=nearest_)
+
+    command = commands.add_parser("tree", help="cfr iterations on compiled trees")
+    command.add_argument("--game", choices=list(GAMES), default="kuhn")
+    command.add_argument("-n", "--number", type=int, default=100)
+    command.set_defaults(run=tree)
+
+    command = commands.add_parser("walk", help="recursive and iterative traversals")
+    command.add_argument("--blood", type=str, default=None, help="abstraction")
+    command.add_argument("-n", "--number", type=int, default=1000)
+    command.set_defaults(run=walk)
+
+    command = commands.add_parser("kmeans", help="k-means in emd")
+    command.add_argument("--points", type=int, default=10_000)
+    command.add_argument("--clusters", type=int, default=20)
+    command.add_argument("--dimension", type=int, default=30)
+    command.add_argument("--maxiter", type=int, default=20)
+    command.set_defaults(run=kmeans_)
+
+    command = commands.add_parser("hs", help="monte carlo hand strength")
+    command.add_argument("--street", type=int, default=3)
+    command.add_argument("--hands", type=int, default=100)
+    command.add_argument("--maxiter", type=int, default=1000)
+    command.set_defaults(run=hs)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
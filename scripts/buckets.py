@@ -0,0 +1,88 @@
+from tqdm import tqdm
+
+import importlib
+import argparse
+import random
+
+from zerosum.pkr.abstraction.buckets import BucketTable, key
+from zerosum.pkr.abstraction import isomorphism
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        "buckets", description="precompute the card buckets of a blood abstraction"
+    )
+    parser.add_argument("--abstraction", type=str, required=True)
+    # streets with at most `limit` canonical deals are enumerated, others are
+    # sampled
+    parser.add_argument("--limit", type=int, default=2_000_000)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("-f", "--force", action="store_true", default=False)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    abstraction = importlib.import_module(f".{args.abstraction}", package="blood")
+    states = abstraction.states
+
+    components = getattr(states, "abstractions", (states,))
+    for component in components:
+        if not hasattr(component, "compute"):
+            continue
+
+        if component.table is not None and not args.force:
+            print(f"{component.path} exists, skipping")
+            continue
+
+        street = component.street
+        deals = _deals(street, args.limit, args.samples, random.Random(args.seed))
+
+        keys, buckets = [], []
+        for hand, community in tqdm(deals, desc=str(component.path)):
+            keys.append(key(hand, community))
+            buckets.append(component.compute(hand, community))
+
+        BucketTable.build(keys, buckets).save(component.path)
+
+
+def _deals(street: int, limit: int, samples: int, rng: random.Random) -> list:
+    # every canonical deal when there are few enough, or distinct samples
+    indexer = isomorphism.indexer(street)
+    if len(indexer) <= limit:
+        return [indexer.unindex(i) for i in range(len(indexer))]
+
+    seen, unique = set(), []
+    for hand, community in _sample(street, rng):
+        k = key(hand, community)
+        if k not in seen:
+            seen.add(k)
+            unique.append((hand, community))
+
+            if len(unique) == samples:
+                break
+
+    return unique
+
+
+def _sample(street: int, rng: random.Random):
+    # on long boards the cards after the river and before the last one are red
+    # since the run goes on
+    while True:
+        cards = list(range(52))
+        rng.shuffle(cards)
+        hand, rest = tuple(cards[:2]), cards[2:]
+
+        if street < 6:
+            yield hand, tuple(rest[:street])
+            continue
+
+        red = [card for card in rest[4:] if card % 4 in (1, 2)]
+        if len(red) < street - 5:
+            continue
+
+        run = red[: street - 5]
+        last = next(card for card in rest[4:] if card not in run)
+        yield hand, tuple(rest[:4]) + tuple(run) + (last,)
+
+
+if __name__ == "__main__":
+    main()
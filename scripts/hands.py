@@ -1,15 +1,12 @@
-import numpy as np
-from tqdm import tqdm
-
-from zerosum.pkr.abstraction.hands import equity, rhand
-from zerosum.pkr.abstraction.kmeans import kmeanspp, kmeans
+from zerosum.pkr.abstraction import artifacts, engine, pipeline
 
+from functools import partial
 import argparse
-import pickle
-import os
+import random
 
 
 ACCURACY = 3000
+MAXITER = 1000
 
 
 def main():
@@ -20,6 +17,8 @@ def main():
     parser.add_argument("--clusters", type=int, required=True)
     parser.add_argument("--batch", type=int, required=True)
     parser.add_argument("-d", "--dimension", type=int, required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
     args = parser.parse_args()
 
     centroids = cluster(
@@ -27,39 +26,40 @@ def main():
         args.clusters,
         args.batch,
         dimension=args.dimension,
+        workers=args.workers,
+        seed=args.seed,
     )
 
-    path = f"centroids/{args.street}-{args.clusters}-{args.dimension}.pkl"
-    if os.path.exists(path):
+    path = f"centroids/{args.street}-{args.clusters}-{args.dimension}"
+    if artifacts.exists(path):
         raise RuntimeError
 
-    with open(path, "wb") as f:
-        pickle.dump(centroids, f)
-
-
-def cluster(street: int, clusters: int, batch: int, dimension: int):
-    equities = {}
-
-    for _ in tqdm(range(batch)):
-        h = rhand(2 + street)
-        equities[h] = equity(h[:2], h[2:], dimension, ACCURACY)
-
-    vecs = np.vstack(list(equities.values()))
-    centroids = kmeanspp(vecs, clusters)
-    centroids, labels = kmeans(vecs, centroids, 1000)
+    artifacts.save(
+        path,
+        centroids,
+        street=args.street,
+        metric="emd",
+        kind="equity",
+        maxiter=MAXITER,
+        accuracy=ACCURACY,
+        seed=args.seed,
+    )
 
-    bad = 1
-    while bad > 0:
-        ncentroids = []
-        bad = 0
 
-        for label, centroid in enumerate(centroids):
-            if np.sum(labels == label) > 10:
-                ncentroids.append(centroid)
-            else:
-                bad += 1
+def equities(street: int, dimension: int, rng: random.Random, size: int):
+    deals = pipeline.deals(rng, street, size)
+    return engine.equity(deals[:, :2], deals[:, 2:], dimension, ACCURACY)
 
-        centroids = np.vstack(ncentroids)
-        centroids, labels = kmeans(vecs, centroids, 1000)
 
-    return centroids
+def cluster(
+    street: int,
+    clusters: int,
+    batch: int,
+    dimension: int,
+    workers=None,
+    seed: int = 0,
+):
+    path = f"features/equity-{street}-{dimension}-{batch}-s{seed}.npy"
+    generate = partial(equities, street, dimension)
+    vecs = pipeline.features(path, batch, dimension, generate, workers, seed)
+    return pipeline.cluster(vecs, clusters, maxiter=MAXITER, seed=seed)
@@ -1,11 +1,9 @@
-import numpy as np
-from tqdm import tqdm
-
-from zerosum.pkr.abstraction.hands import made, rhand
-from zerosum.pkr.abstraction.kmeans import kmeanspp, kmeans
+from zerosum.pkr.abstraction import engine, pipeline
 
+from functools import partial
 import argparse
 import pickle
+import random
 import sys, os
 
 
@@ -17,36 +15,31 @@ def main():
     parser.add_argument("--clusters", type=int, required=True)
     parser.add_argument("--batch", type=int, required=True)
     parser.add_argument("-f", "--future", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
     args = parser.parse_args()
 
-    centroids = cluster(args.street, args.clusters, args.batch, future=args.future)
+    centroids = cluster(
+        args.street,
+        args.clusters,
+        args.batch,
+        future=args.future,
+        workers=args.workers,
+        seed=args.seed,
+    )
     with os.fdopen(sys.stdout.fileno(), "wb", closefd=False) as stdout:
         pickle.dump(centroids, stdout)
 
 
-def cluster(street: int, clusters: int, batch: int, future: int):
-    equities = {}
-
-    for _ in tqdm(range(batch)):
-        h = rhand(2 + street)
-        equities[h] = made(h[:2], h[2:], 10, 100, future=future)
-
-    vecs = np.vstack(list(equities.values()))
-    centroids = kmeanspp(vecs, clusters)
-    centroids, labels = kmeans(vecs, centroids, 1000)
-
-    bad = 1
-    while bad > 0:
-        ncentroids = []
-        bad = 0
-
-        for label, centroid in enumerate(centroids):
-            if np.sum(labels == label) > 10:
-                ncentroids.append(centroid)
-            else:
-                bad += 1
+def mades(street: int, future: int, rng: random.Random, size: int):
+    deals = pipeline.deals(rng, street, size)
+    return engine.made(deals[:, :2], deals[:, 2:], 10, 100, future)
 
-        centroids = np.vstack(ncentroids)
-        centroids, labels = kmeans(vecs, centroids, 1000)
 
-    return centroids
+def cluster(
+    street: int, clusters: int, batch: int, future: int, workers=None, seed: int = 0
+):
+    path = f"features/made-{street}-f{future}-{batch}-s{seed}.npy"
+    generate = partial(mades, street, future)
+    vecs = pipeline.features(path, batch, 10, generate, workers, seed)
+    return pipeline.cluster(vecs, clusters, seed=seed)
@@ -1,17 +1,17 @@
 import numpy as np
-from tqdm import tqdm
 
-from zerosum.pkr.abstraction.hands import rhand
-from zerosum.pkr.abstraction.ochs import ochs
-from zerosum.pkr.abstraction.kmeans import kmeanspp, kmeans
+from zerosum.pkr.abstraction.ochs import ochs, villains
+from zerosum.pkr.abstraction.kmeans import l2
+from zerosum.pkr.abstraction import artifacts, pipeline
+import eval7
 
+from functools import partial
 import argparse
-import pickle
-import os
+import random
 
 
-def l2(a, b):
-    return np.linalg.norm(a - b)
+_cards = eval7.Deck().cards
+MAXITER = 1000
 
 
 def main():
@@ -21,41 +21,37 @@ def main():
     parser.add_argument("--street", type=int, required=True)
     parser.add_argument("--clusters", type=int, required=True)
     parser.add_argument("--batch", type=int, required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
     args = parser.parse_args()
 
-    centroids = cluster(args.street, args.clusters, args.batch)
+    centroids = cluster(
+        args.street, args.clusters, args.batch, workers=args.workers, seed=args.seed
+    )
 
-    path = f"ochs/{args.street}-{args.clusters}.pkl"
-    if os.path.exists(path):
+    path = f"ochs/{args.street}-{args.clusters}"
+    if artifacts.exists(path):
         raise RuntimeError
 
-    with open(path, "wb") as f:
-        pickle.dump(centroids, f)
-
-
-def cluster(street: int, clusters: int, batch: int):
-    equities = {}
-
-    for _ in tqdm(range(batch)):
-        h = rhand(2 + street)
-        equities[h] = ochs(h[:2], h[2:])
-
-    vecs = np.vstack(list(equities.values()))
-    centroids = kmeanspp(vecs, clusters, metric=l2)
-    centroids, labels = kmeans(vecs, centroids, 1000, metric=l2)
+    artifacts.save(
+        path,
+        centroids,
+        street=args.street,
+        metric="l2",
+        kind="ochs",
+        maxiter=MAXITER,
+        seed=args.seed,
+    )
 
-    bad = 1
-    while bad > 0:
-        ncentroids = []
-        bad = 0
 
-        for label, centroid in enumerate(centroids):
-            if np.sum(labels == label) > 10:
-                ncentroids.append(centroid)
-            else:
-                bad += 1
+def strengths(street: int, rng: random.Random, size: int):
+    deals = pipeline.deals(rng, street, size)
+    hands = [tuple(_cards[c] for c in deal) for deal in deals]
+    return np.vstack([ochs(hand[:2], hand[2:]) for hand in hands])
 
-        centroids = np.vstack(ncentroids)
-        centroids, labels = kmeans(vecs, centroids, 1000, metric=l2)
 
-    return centroids
+def cluster(street: int, clusters: int, batch: int, workers=None, seed: int = 0):
+    path = f"features/ochs-{street}-{batch}-s{seed}.npy"
+    generate = partial(strengths, street)
+    vecs = pipeline.features(path, batch, len(villains), generate, workers, seed)
+    return pipeline.cluster(vecs, clusters, metric=l2, maxiter=MAXITER, seed=seed)
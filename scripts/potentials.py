@@ -1,15 +1,12 @@
-import numpy as np
-from tqdm import tqdm
-
-from zerosum.pkr.abstraction.hands import potential, rhand
-from zerosum.pkr.abstraction.kmeans import kmeanspp, kmeans
+from zerosum.pkr.abstraction import artifacts, engine, pipeline
 
+from functools import partial
 import argparse
-import pickle
-import os
+import random
 
 
 ACCURACY = 3000
+MAXITER = 1000
 
 
 def main():
@@ -21,6 +18,8 @@ def main():
     parser.add_argument("--batch", type=int, required=True)
     parser.add_argument("-d", "--dimension", type=int, required=True)
     parser.add_argument("-f", "--future", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
     args = parser.parse_args()
 
     centroids = cluster(
@@ -29,41 +28,43 @@ def main():
         args.batch,
         dimension=args.dimension,
         future=args.future,
+        workers=args.workers,
+        seed=args.seed,
     )
 
-    path = (
-        f"potentials/{args.street}-f{args.future}-{args.clusters}-{args.dimension}.pkl"
-    )
-    if os.path.exists(path):
+    path = f"potentials/{args.street}-f{args.future}-{args.clusters}-{args.dimension}"
+    if artifacts.exists(path):
         raise RuntimeError
 
-    with open(path, "wb") as f:
-        pickle.dump(centroids, f)
-
-
-def cluster(street: int, clusters: int, batch: int, dimension: int, future: int):
-    equities = {}
-
-    for _ in tqdm(range(batch)):
-        h = rhand(2 + street)
-        equities[h] = potential(h[:2], h[2:], dimension, ACCURACY, future=future)
-
-    vecs = np.vstack(list(equities.values()))
-    centroids = kmeanspp(vecs, clusters)
-    centroids, labels = kmeans(vecs, centroids, 1000)
-
-    bad = 1
-    while bad > 0:
-        ncentroids = []
-        bad = 0
-
-        for label, centroid in enumerate(centroids):
-            if np.sum(labels == label) > 10:
-                ncentroids.append(centroid)
-            else:
-                bad += 1
+    artifacts.save(
+        path,
+        centroids,
+        street=args.street,
+        metric="emd",
+        kind=f"potential-f{args.future}",
+        maxiter=MAXITER,
+        accuracy=ACCURACY,
+        seed=args.seed,
+    )
 
-        centroids = np.vstack(ncentroids)
-        centroids, labels = kmeans(vecs, centroids, 1000)
 
-    return centroids
+def potentials(
+    street: int, dimension: int, future: int, rng: random.Random, size: int
+):
+    deals = pipeline.deals(rng, street, size)
+    return engine.potential(deals[:, :2], deals[:, 2:], dimension, ACCURACY, future)
+
+
+def cluster(
+    street: int,
+    clusters: int,
+    batch: int,
+    dimension: int,
+    future: int,
+    workers=None,
+    seed: int = 0,
+):
+    path = f"features/potential-{street}-f{future}-{dimension}-{batch}-s{seed}.npy"
+    generate = partial(potentials, street, dimension, future)
+    vecs = pipeline.features(path, batch, dimension, generate, workers, seed)
+    return pipeline.cluster(vecs, clusters, maxiter=MAXITER, seed=seed)
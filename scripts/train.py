@@ -5,21 +5,28 @@ import argparse
 
 from zerosum.game import Game, A_inv, I
 from zerosum.algorithms.algo import Implementation, Runner
+from zerosum.algorithms.table import Table
+from zerosum.index import InfosetIndex
 
 # algorithms
 from zerosum.algorithms.lcfr import ESLCFR
+from zerosum.algorithms.dcfr import ESDCFR
 from zerosum.algorithms.escfr import ESCFR
 from zerosum.algorithms.cfrplus import ESCFRP
 
 
 FOREVER = 100000000000000
 THRESHOLD = 300_000
+WARMUP = 100_000  # iterations before pruning
 
 
 def main():
     algos = {
         "LCFR": ESLCFR(THRESHOLD),
         "LCFR1M": ESLCFR(1_000_000),
+        "DCFR": ESDCFR(THRESHOLD),
+        # regret-based pruning after a warm-up
+        "LCFR-RBP": ESLCFR(THRESHOLD, prune=0.95, prune_after=WARMUP),
         "ESCFR": ESCFR(),
         "CFR+": ESCFRP(),
     }
@@ -31,6 +38,8 @@ def main():
     parser.add_argument(
         "--algorithm", type=str, required=True, choices=list(algos.keys())
     )
+    parser.add_argument("-t", "--table", action="store_true", default=False)
+    parser.add_argument("-w", "--workers", type=int, default=1)
     args = parser.parse_args()
 
     if not args.blood:
@@ -44,17 +53,23 @@ def main():
         game = abstraction.TrainingAbstraction
 
     algo = algos[args.algorithm]
-    train(game, algo, args.checkpoint)
+    if args.table:
+        # array-backed storage, only used for fresh checkpoints
+        index = InfosetIndex()
+        algo.regrets, algo.strategies = Table(index=index), Table(index=index)
+
+    train(game, algo, args.checkpoint, args.workers)
 
 
 def train(
     game: Callable[[], Game[A_inv, I]],
     impl: Implementation[A_inv, I],
     checkpt: pathlib.Path,
+    workers: int = 1,
 ):
-    runner = Runner(impl, game, checkpt, FOREVER, 1000)
+    runner = Runner(impl, game, checkpt, FOREVER, 1000, workers=workers)
     if checkpt.exists():
-        runner = Runner.load(checkpt, game, FOREVER, 1000)
+        runner = Runner.load(checkpt, game, FOREVER, 1000, workers=workers)
 
     try:
         runner.run()
@@ -1,6 +1,7 @@
 from .algorithms import *
 from .abstraction import algebraic, abstract
 from .game import Game, InfoSet, Player
+from .index import InfosetIndex
 from .strategy import Strategy, play, match, normalize
 
 
@@ -9,8 +10,10 @@ __all__ = [
     "abstract",
     "Algorithm",
     "Runner",
+    "Table",
     "Game",
     "InfoSet",
+    "InfosetIndex",
     "Player",
     "Strategy",
     "play",
@@ -22,4 +25,6 @@ __all__ = [
     "ESCFRP",
     "CFRP",
     "ESLCFR",
+    "ESDCFR",
+    "TreeCFR",
 ]
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import TypeVar, Hashable, Generic, Protocol, cast
-from typing import Type, Callable, Optional
-from dataclasses import dataclass, is_dataclass
+from typing import TypeVar, Hashable, Generic, Protocol, cast, overload
+from typing import Type, Callable, ClassVar, Iterable, Optional, Sequence
+from dataclasses import dataclass, field, is_dataclass
+import math
 import abc
 
 from .game import InfoSet, A_cov, A_inv, I, Game, Player
@@ -20,6 +21,10 @@ H = TypeVar("H", bound=Hashable)
 
 
 class AlgebraicStateAbstraction(StateAbstraction[A_con], Generic[A_con, H], abc.ABC):
+    # the values the abstraction can take, if known. products of abstractions
+    # with domains can be packed into integer keys
+    domain: Optional[Sequence[Hashable]] = None
+
     def __mul__(self, other: StateAbstraction) -> AlgebraicStateAbstraction:
         # vital to combine into single product instance, otherwise performance
         # suffers greatly due to the explosion in function calls
@@ -31,22 +36,53 @@ class AlgebraicStateAbstraction(StateAbstraction[A_con], Generic[A_con, H], abc.
             return _ProductStateAbstraction((self,) + other.abstractions)
         return _ProductStateAbstraction((self, other))
 
+    def packed(self) -> _PackedStateAbstraction:
+        abstractions: tuple[StateAbstraction, ...] = (self,)
+        if isinstance(self, _ProductStateAbstraction):
+            abstractions = self.abstractions
+        return _PackedStateAbstraction(abstractions)
+
     @abc.abstractmethod
     def __call__(self, infoset: InfoSet[A_con]) -> H:
         ...
 
 
+@overload
 def algebraic(
-    state: Callable[[InfoSet[A_inv]], H]
+    state: Callable[[InfoSet[A_inv]], H],
+    *,
+    domain: Optional[Iterable[H]] = None,
 ) -> AlgebraicStateAbstraction[A_inv, H]:
-    class _Algebraic(AlgebraicStateAbstraction):
-        def __call__(self, infoset: InfoSet[A_inv]) -> H:
-            return state(infoset)
+    ...
+
+
+@overload
+def algebraic(
+    state: None = None,
+    *,
+    domain: Optional[Iterable[H]] = None,
+) -> Callable[[Callable[[InfoSet[A_inv]], H]], AlgebraicStateAbstraction[A_inv, H]]:
+    ...
+
+
+def algebraic(state=None, *, domain=None):
+    # usable as `@algebraic` or `@algebraic(domain=range(10))`
+    def decorator(state):
+        class _Algebraic(AlgebraicStateAbstraction):
+            def __call__(self, infoset: InfoSet[A_inv]) -> H:
+                return state(infoset)
 
-    _Algebraic.__name__ = state.__name__
-    _Algebraic.__qualname__ = state.__qualname__
+        _Algebraic.__name__ = state.__name__
+        _Algebraic.__qualname__ = state.__qualname__
 
-    return _Algebraic()
+        abstraction = _Algebraic()
+        if domain is not None:
+            abstraction.domain = tuple(domain)
+        return abstraction
+
+    if state is None:
+        return decorator
+    return decorator(state)
 
 
 @dataclass(frozen=True)
@@ -57,6 +93,54 @@ class _ProductStateAbstraction(AlgebraicStateAbstraction[A_con, H]):
         return tuple(a(infoset) for a in self.abstractions)
 
 
+@dataclass(frozen=True)
+class _PackedStateAbstraction(AlgebraicStateAbstraction[A_con, int]):
+    # a product abstraction whose values are packed into a single integer,
+    # in mixed radix: the value of each component is replaced by its index in
+    # the component's domain. keys are much smaller than nested tuples and
+    # hash for free ; `decode` recovers the tuple
+    abstractions: tuple[StateAbstraction, ...]
+
+    _codes: tuple[dict[Hashable, int], ...] = field(init=False, repr=False)
+    _domains: tuple[tuple[Hashable, ...], ...] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        domains = []
+        for a in self.abstractions:
+            domain = getattr(a, "domain", None)
+            if domain is None:
+                name = type(a).__name__
+                raise ValueError(f"cannot pack {name}, its domain is unknown")
+            domains.append(tuple(domain))
+
+        size = math.prod(len(domain) for domain in domains)
+        if size > 2 ** 63:
+            raise OverflowError(f"{size} states do not fit in 64 bits")
+
+        codes = tuple({v: i for i, v in enumerate(domain)} for domain in domains)
+        object.__setattr__(self, "_codes", codes)
+        object.__setattr__(self, "_domains", tuple(domains))
+        object.__setattr__(self, "domain", range(size))
+
+    def __call__(self, infoset: InfoSet[A_con]) -> int:
+        key = 0
+        for a, codes in zip(self.abstractions, self._codes):
+            value = a(infoset)
+            code = codes.get(value)
+            if code is None:
+                name = type(a).__name__
+                raise ValueError(f"{value!r} is not in the domain of {name}")
+            key = key * len(codes) + code
+        return key
+
+    def decode(self, key: int) -> tuple[Hashable, ...]:
+        values = []
+        for domain in reversed(self._domains):
+            key, code = divmod(key, len(domain))
+            values.append(domain[code])
+        return tuple(reversed(values))
+
+
 class ActionAbstraction(Protocol[A_inv]):
     # we want `I` to be _bounded_ by `InfoSet[A_cov]`
     # but I don't know how to specify that
@@ -66,21 +150,30 @@ class ActionAbstraction(Protocol[A_inv]):
 
 
 class _InfoSet(Generic[A_cov]):
+    # the abstract state is computed at most once per instance, along with its
+    # hash and the actions: an infoset is hashed and compared several times
+    # per dict lookup, and evaluating the abstraction is expensive
     __slots__ = (
         "_infoset",
         "state",
         "action",
         "_saved",
         "_saved_state",
+        "_saved_hash",
         "_saved_actions",
     )
 
+    # number of abstract states evaluated in this process, counted on misses
+    # only so that hits stay free
+    evaluated: ClassVar[int] = 0
+
     _infoset: InfoSet[A_cov]
     state: StateAbstraction
     action: ActionAbstraction
 
     _saved: bool
     _saved_state: Optional[Hashable]
+    _saved_hash: int
     _saved_actions: Optional[tuple[A_cov, ...]]
 
     def __init__(
@@ -94,24 +187,38 @@ class _InfoSet(Generic[A_cov]):
         self.action = action
         self._saved = False
         self._saved_state = None
+        self._saved_hash = 0
         self._saved_actions = None
 
     def actions(self) -> tuple[A_cov, ...]:
-        if self._saved:
-            return cast(tuple[A_cov, ...], self._saved_actions)
-        return self.action(self._infoset)
+        actions = self._saved_actions
+        if actions is None:
+            actions = self._saved_actions = self.action(self._infoset)
+        return actions
 
     @property
     def _state(self):
         if self._saved:
             return self._saved_state
-        return self.state(self._infoset)
+
+        _InfoSet.evaluated += 1
+        state = self._saved_state = self.state(self._infoset)
+        self._saved_hash = hash(state)
+        self._saved = True
+        return state
 
     def __eq__(self, other: object):
         return isinstance(other, _InfoSet) and self._state == other._state
 
     def __hash__(self):
-        return hash(self._state)
+        if not self._saved:
+            self._state
+        return self._saved_hash
+
+    @property
+    def key(self) -> Hashable:
+        # what identifies the infoset
+        return self._state
 
     def __repr__(self):
         return repr(self._state)
@@ -123,8 +230,19 @@ class _InfoSet(Generic[A_cov]):
         state, actions = state
         object.__setattr__(self, "_saved", True)
         object.__setattr__(self, "_saved_state", state)
+        object.__setattr__(self, "_saved_hash", hash(state))
         object.__setattr__(self, "_saved_actions", actions)
 
+    @classmethod
+    def restore(
+        cls, state: Hashable, actions: Optional[tuple[A_cov, ...]] = None
+    ) -> _InfoSet[A_cov]:
+        # an infoset of which only the abstract state is known, as after
+        # unpickling. the actions may be filled in later
+        infoset = cls.__new__(cls)
+        infoset.__setstate__((state, actions))
+        return infoset
+
 
 def abstract(
     game: Type[Game[A_inv, I]],
@@ -1,8 +1,23 @@
 from .algo import Algorithm, Runner
+from .table import Table
 from .cfr import CFR
 from .escfr import ESCFR, OSCFR
 from .cfrplus import ESCFRP, CFRP
 from .lcfr import ESLCFR
+from .dcfr import ESDCFR
+from .tree import TreeCFR
 
 
-__all__ = ["Algorithm", "Runner", "CFR", "ESCFR", "OSCFR", "ESCFRP", "CFRP", "ESLCFR"]
+__all__ = [
+    "Algorithm",
+    "Runner",
+    "Table",
+    "CFR",
+    "ESCFR",
+    "OSCFR",
+    "ESCFRP",
+    "CFRP",
+    "ESLCFR",
+    "ESDCFR",
+    "TreeCFR",
+]
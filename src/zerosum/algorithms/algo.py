@@ -10,7 +10,9 @@ from dataclasses import dataclass
 import pathlib
 import pickle
 
+from ..abstraction import _InfoSet
 from ..game import Game, A_inv, I
+from .parallel import hogwild
 
 
 class Implementation(Protocol[A_inv, I]):
@@ -51,7 +53,15 @@ class Runner(Generic[A_inv, I]):
 
     logging: int = 10
 
+    # with several workers, external sampling traversals run in parallel
+    # against shared tables (see `parallel.py`) and logging is in seconds
+    workers: int = 1
+    capacity: int = 2 ** 24
+
     def run(self):
+        if self.workers > 1:
+            return hogwild(self)
+
         impl, game = self.impl, self.game
         checkpt = self.checkpt
 
@@ -64,6 +74,7 @@ class Runner(Generic[A_inv, I]):
                     it=it,
                     touched=impl.touched,
                     infosets=len(impl.regrets),
+                    evaluated=_InfoSet.evaluated,
                 )
 
             if checkpt is not None and not (1 + it) % checkpt:
@@ -81,8 +92,9 @@ class Runner(Generic[A_inv, I]):
         game: type[Game[A_inv, I]],
         until: int,
         checkpt: Optional[int] = None,
+        workers: int = 1,
     ):
         with open(path, "rb") as f:
             impl = pickle.load(f)
 
-        return cls(impl, game, path, until, checkpt)
+        return cls(impl, game, path, until, checkpt, workers=workers)
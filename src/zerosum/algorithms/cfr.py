@@ -2,20 +2,7 @@ from typing import Generic
 from dataclasses import dataclass, field
 
 from ..game import Game, Player, A_inv, I
-
-
-def matching(regrets: list[float], inplace: bool = True):
-    regrets = [max(0, r) for r in regrets]
-    denom = sum(regrets)
-
-    if denom > 0:
-        if inplace:
-            for i, r in enumerate(regrets):
-                regrets[i] = r / denom
-            return regrets
-        return [r / denom for r in regrets]
-
-    return [1 / len(regrets)] * len(regrets)
+from .matching import matching
 
 
 @dataclass
@@ -67,7 +54,7 @@ class CFR(Generic[A_inv, I]):
         R = regrets[infoset]
         S = strategies[infoset]
 
-        strategy = matching(list(R.values()))
+        strategy = matching(R.values())
         cfs = {action: 0 for action in actions}
         value = 0
 
@@ -3,7 +3,7 @@ from dataclasses import dataclass, field
 import random
 
 from ..game import Game, Player, I, A_inv
-from .cfr import matching
+from .matching import matching
 
 
 # https://arxiv.org/pdf/1407.5042.pdf
@@ -12,7 +12,9 @@ from .cfr import matching
 # - the regrets are clipped above 0 when the strategy is updated
 #   (regret matching+ learner)
 # apparently CFR+ doesn't help when used with MCCFR, so maybe this file is
-# useless
+# useless. there is no regret-based pruning here: regret matching+ clips the
+# regrets at 0, they never get far below it. nor is there an `iterative`
+# traversal (see `stack.py`)
 @dataclass
 class ESCFRP(Generic[A_inv, I]):
     regrets: dict[I, dict[A_inv, float]] = field(default_factory=dict)
@@ -53,7 +55,7 @@ class ESCFRP(Generic[A_inv, I]):
         R = regrets[infoset]
         S = strategies[infoset]
 
-        strategy = matching(list(R.values()))
+        strategy = matching(R.values())
 
         if game.active != player:
             (action,) = random.choices(actions, weights=strategy)
@@ -79,20 +81,6 @@ class ESCFRP(Generic[A_inv, I]):
         return value
 
 
-def matching(regrets: list[float], inplace: bool = True):
-    regrets = [max(0, r) for r in regrets]
-    denom = sum(regrets)
-
-    if denom > 0:
-        if inplace:
-            for i, r in enumerate(regrets):
-                regrets[i] = r / denom
-            return regrets
-        return [r / denom for r in regrets]
-
-    return [1 / len(regrets)] * len(regrets)
-
-
 @dataclass
 class CFRP(Generic[A_inv, I]):
     regrets: dict[I, dict[A_inv, float]] = field(default_factory=dict)
@@ -144,7 +132,7 @@ class CFRP(Generic[A_inv, I]):
         R = regrets[infoset]
         S = strategies[infoset]
 
-        strategy = matching(list(R.values()))
+        strategy = matching(R.values())
         cfs = {action: 0 for action in actions}
         value = 0
 
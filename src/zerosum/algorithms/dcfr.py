@@ -0,0 +1,61 @@
+from typing import Generic, MutableMapping
+from dataclasses import dataclass, field
+import math
+
+from ..game import I, A_inv
+from .lcfr import ESLCFR
+
+
+# DCFR or discounted CFR: at every period t, positive regrets are multiplied
+# by t^alpha / (t^alpha + 1), negative regrets by t^beta / (t^beta + 1) and
+# the strategies by (t / (t + 1))^gamma. LCFR is alpha = beta = gamma = 1 ;
+# the defaults are those recommended by the paper. negative regrets decay
+# fast, so that blunders with a large negative regret are tried again.
+# https://arxiv.org/pdf/1809.04040.pdf
+@dataclass
+class ESDCFR(ESLCFR[A_inv, I], Generic[A_inv, I]):
+    alpha: float = 1.5
+    beta: float = 0.0
+    gamma: float = 2.0
+
+    # the logs of the cumulated positive, negative and strategy factors by
+    # period. dict rows are discounted when next touched, regrets keep their
+    # sign until then
+    _logs: list[tuple[float, float, float]] = field(
+        default_factory=lambda: [(0.0, 0.0, 0.0)]
+    )
+
+    def _factors(self, t: int) -> tuple[float, float, float]:
+        a, b = t ** self.alpha, t ** self.beta
+        return a / (a + 1), b / (b + 1), (t / (t + 1)) ** self.gamma
+
+    def _discount(self):
+        positive, negative, strategy = self._factors(self.period)
+        logs = zip(self._logs[-1], (positive, negative, strategy))
+        self._logs.append(tuple(log + math.log(f) for log, f in logs))  # type: ignore
+
+        if not isinstance(self.regrets, dict):
+            self.regrets.scale(positive, negative)
+        if not isinstance(self.strategies, dict):
+            self.strategies.scale(strategy)
+
+    def _catch_up(
+        self,
+        infoset: I,
+        R: MutableMapping[A_inv, float],
+        S: MutableMapping[A_inv, float],
+    ):
+        stamp = self._stamps.get(infoset, 0)
+        if stamp == self.period:
+            return
+
+        then, now = self._logs[stamp], self._logs[self.period]
+        positive, negative, strategy = (math.exp(b - a) for a, b in zip(then, now))
+
+        if isinstance(R, dict):
+            for action, regret in R.items():
+                R[action] = regret * (positive if regret > 0 else negative)
+        if isinstance(S, dict):
+            for action in S:
+                S[action] *= strategy
+        self._stamps[infoset] = self.period
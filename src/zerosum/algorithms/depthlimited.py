@@ -3,7 +3,7 @@ from dataclasses import dataclass, field
 import random
 
 from ..game import Game, Player, I, A_inv
-from .cfr import matching
+from .matching import matching
 
 
 @dataclass
@@ -51,7 +51,7 @@ class DepthLimited(Generic[A_inv, I]):
         R = regrets[infoset]
         S = strategies[infoset]
 
-        strategy = matching(list(R.values()))
+        strategy = matching(R.values())
 
         if game.active != player:
             (action,) = random.choices(actions, weights=strategy)
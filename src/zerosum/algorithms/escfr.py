@@ -1,12 +1,13 @@
 import numpy as np
 
-from typing import Generic
+from typing import ClassVar, Generic
 from dataclasses import dataclass, field
 from collections import defaultdict
 import random
 
 from ..game import Game, Player, I, A_inv
-from .cfr import matching
+from .matching import matching
+from .stack import traverse
 
 
 # Externally Sampled CFR: a version of Monte Carlo CFR
@@ -14,15 +15,36 @@ from .cfr import matching
 # of the player's actions. this is also simpler than CFR.
 # http://mlanctot.info/files/papers/nips09mccfr.pdf
 # http://mlanctot.info/files/papers/PhD_Thesis_MarcLanctot.pdf
+#
+# regret-based pruning: after `prune_after` iterations of warm-up, the
+# traverser skips actions whose regret is below `prune_below` (and which
+# are not played) with probability `prune`. they are still explored now and
+# then, so that a regret that should recover does. deep trees are mostly
+# made of such actions (folding the nuts, all in with air). the threshold
+# should be large compared with the payoffs, a regret that is only slightly
+# negative may well belong to an action of the equilibrium.
+# https://www.science.org/doi/10.1126/science.aay2400 (supplementary)
 @dataclass
 class ESCFR(Generic[A_inv, I]):
     regrets: dict[I, dict[A_inv, float]] = field(default_factory=dict)
     strategies: dict[I, dict[A_inv, float]] = field(default_factory=dict)
     touched: int = 0
+    iterations: int = 0
+
+    prune: float = 0.0
+    prune_below: float = -1e4
+    prune_after: int = 0
+
+    # traverse on an explicit stack rather than recursively, see `stack.py`
+    iterative: bool = False
+
+    # rows are never discounted
+    _catch_up: ClassVar[None] = None
 
     def _run_iteration(self, game: type[Game[A_inv, I]]):
         for p in range(game.players):
             self.walk(game(), Player(p), self.regrets, self.strategies)
+        self.iterations += 1
 
     def walk(
         self,
@@ -31,6 +53,9 @@ class ESCFR(Generic[A_inv, I]):
         regrets: dict[I, dict[A_inv, float]],
         strategies: dict[I, dict[A_inv, float]],
     ):
+        if self.iterative:
+            return traverse(self, game, player, regrets, strategies)
+
         self.touched += 1
 
         if game.terminal:
@@ -51,7 +76,7 @@ class ESCFR(Generic[A_inv, I]):
         R = regrets[infoset]
         S = strategies[infoset]
 
-        strategy = matching(list(R.values()))
+        strategy = matching(R.values())
 
         if game.active != player:
             (action,) = random.choices(actions, weights=strategy)
@@ -62,16 +87,22 @@ class ESCFR(Generic[A_inv, I]):
 
             return value
 
-        cfs = {action: 0 for action in actions}
+        cfs = {}
         value = 0
+        prune = self.prune > 0 and self.iterations >= self.prune_after
+        prune = prune and random.random() < self.prune
 
         for action, p in zip(actions, strategy):
+            if prune and p == 0 and R[action] < self.prune_below:
+                continue
+
             cf = self.walk(game.apply(action), player, regrets, strategies)
             cfs[action] = cf
             value += p * cf
 
-        for action in actions:
-            R[action] += cfs[action] - value
+        # the regrets of pruned actions are left as they are
+        for action, cf in cfs.items():
+            R[action] += cf - value
 
         return value
 
@@ -128,7 +159,7 @@ class OSCFR(Generic[A_inv, I]):
         R = regrets[infoset]
         S = strategies[infoset]
 
-        strategy = matching(list(R.values()))
+        strategy = matching(R.values())
 
         if game.active != player:
             sampling = self._delta(strategy)
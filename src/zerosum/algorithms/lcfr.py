@@ -1,15 +1,17 @@
-from typing import Generic
+from typing import Generic, MutableMapping
 from dataclasses import dataclass, field
 import random
 
 from ..game import Game, Player, I, A_inv
-from .cfr import matching
+from .matching import matching
+from .stack import traverse
 
 
 # LCFR or linear CFR: the idea is to discount regrets rather
 # than strategies ; it can be mixed with MCCFR. LCFR can supposedly
 # help when the payoff range is large (notably, some actions lead to large
-# negative regret - they are blunders).
+# negative regret - they are blunders). regret-based pruning works as in
+# `ESCFR`.
 # https://dl.acm.org/doi/pdf/10.1609/aaai.v33i01.33011829
 @dataclass
 class ESLCFR(Generic[A_inv, I]):
@@ -20,12 +22,40 @@ class ESLCFR(Generic[A_inv, I]):
 
     _touched: int = 0
     touched: int = 0
+    iterations: int = 0
     period: int = 0
 
+    prune: float = 0.0
+    prune_below: float = -1e4
+    prune_after: int = 0
+
+    # traverse on an explicit stack rather than recursively, see `stack.py`
+    iterative: bool = False
+
+    # discounting is lazy. tables scale all their rows in constant time, dict
+    # rows are discounted when next touched: `_stamps` holds the period they
+    # were last discounted at
+    _stamps: dict[I, int] = field(default_factory=dict)
+
+    def __setstate__(self, state):
+        # checkpoints from before lazy discounting are discounted up to date
+        if "_stamps" not in state:
+            rows = (*state["regrets"], *state["strategies"])
+            state["_stamps"] = dict.fromkeys(rows, state["period"])
+        self.__dict__.update(state)
+
     def _run_iteration(self, game: type[Game[A_inv, I]]):
+        touched = self.touched
         for p in (0, 1):
             self.walk(game(), Player(p), self.regrets, self.strategies)
+        self.iterations += 1
 
+        self._after(self.touched - touched)
+
+    def _after(self, touched: int):
+        # the discounting schedule is driven by the number of touched nodes,
+        # also called by the parallel runner with the workers' count
+        self._touched += touched
         if self._touched > self.threshold:
             self._touched = 0
             self.period += 1
@@ -34,13 +64,22 @@ class ESLCFR(Generic[A_inv, I]):
     def _discount(self):
         factor = self.period / (self.period + 1)
 
-        for R in self.regrets.values():
-            for action in R:
-                R[action] *= factor
+        for table in (self.regrets, self.strategies):
+            if not isinstance(table, dict):
+                table.scale(factor)
+
+    def _catch_up(self, infoset: I, *rows: MutableMapping[A_inv, float]):
+        stamp = self._stamps.get(infoset, 0)
+        if stamp == self.period:
+            return
 
-        for S in self.strategies.values():
-            for action in S:
-                S[action] *= factor
+        # the factors of periods stamp + 1 to period telescope
+        factor = (stamp + 1) / (self.period + 1)
+        for row in rows:
+            if isinstance(row, dict):
+                for action in row:
+                    row[action] *= factor
+        self._stamps[infoset] = self.period
 
     def walk(
         self,
@@ -49,7 +88,9 @@ class ESLCFR(Generic[A_inv, I]):
         regrets: dict[I, dict[A_inv, float]],
         strategies: dict[I, dict[A_inv, float]],
     ) -> float:
-        self._touched += 1
+        if self.iterative:
+            return traverse(self, game, player, regrets, strategies)
+
         self.touched += 1
 
         if game.terminal:
@@ -69,8 +110,10 @@ class ESLCFR(Generic[A_inv, I]):
 
         R = regrets[infoset]
         S = strategies[infoset]
+        if isinstance(R, dict) or isinstance(S, dict):
+            self._catch_up(infoset, R, S)
 
-        strategy = matching(list(R.values()))
+        strategy = matching(R.values())
 
         if game.active != player:
             (action,) = random.choices(actions, weights=strategy)
@@ -81,15 +124,21 @@ class ESLCFR(Generic[A_inv, I]):
 
             return value
 
-        cfs = {action: 0.0 for action in actions}
+        cfs = {}
         value = 0.0
+        prune = self.prune > 0 and self.iterations >= self.prune_after
+        prune = prune and random.random() < self.prune
 
         for action, p in zip(actions, strategy):
+            if prune and p == 0 and R[action] < self.prune_below:
+                continue
+
             cf = self.walk(game.apply(action), player, regrets, strategies)
             cfs[action] = cf
             value += p * cf
 
-        for action in actions:
-            R[action] += cfs[action] - value
+        # the regrets of pruned actions are left as they are
+        for action, cf in cfs.items():
+            R[action] += cf - value
 
         return value
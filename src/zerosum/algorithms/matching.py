@@ -0,0 +1,91 @@
+from numba import njit
+import numpy.typing as npt
+import numpy as np
+
+from typing import Iterable, Sequence
+
+
+# regret matching: play actions in proportion to their positive regret, or
+# uniformly when no regret is positive. shared by every CFR variant.
+
+
+@njit(cache=True)
+def _matching(regrets: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    n = len(regrets)
+    strategy = np.empty(n)
+
+    denom = 0.0
+    for i in range(n):
+        r = regrets[i]
+        if r > 0:
+            strategy[i] = r
+            denom += r
+        else:
+            strategy[i] = 0.0
+
+    if denom > 0:
+        for i in range(n):
+            strategy[i] /= denom
+    else:
+        for i in range(n):
+            strategy[i] = 1 / n
+
+    return strategy
+
+
+@njit(cache=True)
+def _matchings(
+    regrets: npt.NDArray[np.float64],
+    offsets: npt.NDArray[np.int64],
+    lengths: npt.NDArray[np.int64],
+    out: npt.NDArray[np.float64],
+):
+    for k in range(len(offsets)):
+        o, n = offsets[k], lengths[k]
+
+        denom = 0.0
+        for i in range(o, o + n):
+            r = regrets[i]
+            if r > 0:
+                out[i] = r
+                denom += r
+            else:
+                out[i] = 0.0
+
+        if denom > 0:
+            for i in range(o, o + n):
+                out[i] /= denom
+        else:
+            for i in range(o, o + n):
+                out[i] = 1 / n
+
+
+def matching(regrets: Iterable[float]) -> Sequence[float]:
+    # contiguous rows (see `Table`) go through the compiled kernel, small
+    # python sequences are faster to handle in python
+    if isinstance(regrets, np.ndarray):
+        return _matching(regrets)
+
+    regrets = [r if r > 0 else 0 for r in regrets]
+    denom = sum(regrets)
+
+    if denom > 0:
+        return [r / denom for r in regrets]
+    return [1 / len(regrets)] * len(regrets)
+
+
+def matchings(
+    regrets: npt.NDArray[np.float64],
+    offsets: npt.NDArray[np.int64],
+    lengths: npt.NDArray[np.int64],
+) -> npt.NDArray[np.float64]:
+    # batched regret matching over many rows of a flat regret array ; entries
+    # outside of the rows are left at 0
+    out = np.zeros(len(regrets))
+    _matchings(
+        np.ascontiguousarray(regrets, dtype=np.float64),
+        np.asarray(offsets, dtype=np.int64),
+        np.asarray(lengths, dtype=np.int64),
+        out,
+    )
+    return out
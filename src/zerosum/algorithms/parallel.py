@@ -0,0 +1,525 @@
+from __future__ import annotations
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+import numpy.typing as npt
+import numpy as np
+
+from typing import Any, Generic, Hashable, Iterator, Mapping, MutableMapping
+from typing import Optional
+from typing import TYPE_CHECKING
+import multiprocessing as mp
+import inspect
+import random
+import pickle
+import mmap
+import time
+
+from ..abstraction import _InfoSet
+from ..game import A_inv, I, Player
+from ..index import InfosetIndex, key
+from .table import Table, Row, _LAYOUT_BITS, _LAYOUT_MASK, _RESCALE
+from .table import _scaled, _stored
+
+if TYPE_CHECKING:
+    from .algo import Runner
+
+
+# Hogwild-style training: worker processes run external sampling traversals
+# against regret and strategy tables living in shared memory. reads and
+# updates of rows are lock-free ; only the creation of an infoset id or of a
+# row takes a lock, which is rare once training is under way.
+# https://arxiv.org/pdf/1106.5730.pdf
+#
+# shared tables rely on the `fork` start method: infoset hashes (and the hash
+# seed) must agree between processes. infoset keys must be picklable.
+
+
+def _shared(n: int, dtype: npt.DTypeLike) -> npt.NDArray[Any]:
+    # anonymous mappings are shared with forked children
+    dtype = np.dtype(dtype)
+    buffer = mmap.mmap(-1, max(1, n * dtype.itemsize))
+    return np.frombuffer(buffer, dtype=dtype, count=n)
+
+
+class SharedInfosetIndex(Generic[I]):
+    # an infoset index in shared memory: an open addressing hash table, at
+    # most half full, maps infosets to contiguous ids. the key of every
+    # infoset (see `index.key`) is pickled to an append-only log and compared
+    # on lookup, like a dict compares keys of equal hashes. lookups take no
+    # lock ; only the creation of an id does.
+    def __init__(self, capacity: int, context: Any = None, key_bytes: int = 256):
+        context = context or mp.get_context("fork")
+
+        self.capacity = capacity
+        self._mask = (1 << (2 * capacity - 1).bit_length()) - 1
+        self._hashes = _shared(self._mask + 1, np.int64)
+        self._slots = _shared(self._mask + 1, np.int64)  # ids, -1 when empty
+        self._slots[:] = -1
+        self._count = _shared(1, np.int64)
+        self._lock = context.Lock()
+
+        # the key of id `n`, and whether its infoset is abstract, are pickled
+        # to `_keys[_ends[n - 1] : _ends[n]]` ; the pages of anonymous
+        # mappings are only allocated when written
+        self._keys = mmap.mmap(-1, capacity * key_bytes)
+        self._ends = _shared(capacity, np.int64)
+
+        # the infosets of ids, as created by this process or restored from
+        # their keys
+        self._infosets: dict[int, I] = {}
+        self._local: Optional[InfosetIndex[I]] = None
+
+        # ids this process has looked up, by infoset
+        self._ids: dict[I, int] = {}
+
+    def _record(self, n: int) -> tuple[Hashable, bool]:
+        start = self._ends[n - 1] if n else 0
+        return pickle.loads(self._keys[start : self._ends[n]])
+
+    def _key(self, n: int) -> Hashable:
+        if n in self._infosets:
+            return key(self._infosets[n])
+        return self._record(n)[0]
+
+    def _probe(self, infoset: object, h: int) -> int:
+        # the position of `infoset`, or of the empty slot where it belongs
+        hashes, slots, mask = self._hashes, self._slots, self._mask
+        k = key(infoset)  # type: ignore
+        i = h & mask
+        while True:
+            n = slots[i]
+            if n < 0 or (hashes[i] == h and self._key(n) == k):
+                return i
+            i = (i + 1) & mask
+
+    def __len__(self) -> int:
+        return int(self._count[0])
+
+    def __contains__(self, infoset: object) -> bool:
+        return self.get(infoset) is not None  # type: ignore
+
+    def get(self, infoset: I) -> Optional[int]:
+        n = self._ids.get(infoset)
+        if n is not None:
+            return n
+
+        n = int(self._slots[self._probe(infoset, hash(infoset))])
+        if n < 0:
+            return None
+        self._ids[infoset] = n
+        return n
+
+    def add(self, infoset: I) -> int:
+        n = self.get(infoset)
+        if n is not None:
+            return n
+
+        h = hash(infoset)
+        with self._lock:
+            # another process may have created the id meanwhile
+            i = self._probe(infoset, h)
+            if self._slots[i] < 0:
+                n = int(self._count[0])
+                if n >= self.capacity:
+                    raise MemoryError("shared index is full, increase its capacity")
+
+                start = self._ends[n - 1] if n else 0
+                record = pickle.dumps((key(infoset), isinstance(infoset, _InfoSet)))
+                if start + len(record) > len(self._keys):
+                    raise MemoryError("shared index keys are full, increase key_bytes")
+
+                self._keys[start : start + len(record)] = record
+                self._ends[n] = start + len(record)
+                self._hashes[i] = h
+                self._count[0] = n + 1
+                self._slots[i] = n  # publish
+
+                self._infosets[n] = infoset
+
+        n = int(self._slots[i])
+        self._ids[infoset] = n
+        return n
+
+    def known(self) -> Iterator[tuple[int, I]]:
+        # every id and infoset, in id order, whichever process created them.
+        # the keys of an id are written before it is counted
+        for n in range(len(self)):
+            infoset = self._infosets.get(n)
+            if infoset is None:
+                k, abstract = self._record(n)
+                infoset = _InfoSet.restore(k) if abstract else k
+                self._infosets[n] = infoset  # type: ignore
+            yield n, infoset  # type: ignore
+
+    def local(self) -> InfosetIndex[I]:
+        # an index of the known infosets, extended as ids are created so that
+        # tables snapshotted together share it
+        if self._local is None:
+            self._local = InfosetIndex()
+        for _, infoset in self.known():
+            self._local.add(infoset)
+        return self._local
+
+    def __reduce__(self):
+        return _index, (self.local().__getstate__(),)
+
+
+def _index(state: Any) -> InfosetIndex:
+    index = InfosetIndex.__new__(InfosetIndex)
+    index.__setstate__(state)
+    return index
+
+
+class SharedTable(MutableMapping[I, Row[A_inv]], Generic[I, A_inv]):
+    def __init__(
+        self,
+        rows: int,
+        width: int = 4,
+        layouts: int = 2 ** 22,
+        dtype: npt.DTypeLike = np.float64,
+        context: Any = None,
+        index: Optional[SharedInfosetIndex[I]] = None,
+    ):
+        context = context or mp.get_context("fork")
+
+        # the regret and strategy tables should share their index
+        self.index = index if index is not None else SharedInfosetIndex(rows, context)
+
+        # rows by infoset id, -1 when the infoset has no row here
+        self._entries = _shared(self.index.capacity, np.int64)
+        self._entries[:] = -1
+        self._count = _shared(1, np.int64)
+
+        self._data = _shared(self.index.capacity * width, dtype)
+        self._top = _shared(1, np.int64)
+        self._scales = _shared(2, np.float64)  # see `Table.scale`
+        self._scales[:] = 1.0
+        self._lock = context.Lock()
+
+        # action layouts are pickled to an append-only log so that every
+        # process agrees on layout ids
+        self._log = mmap.mmap(-1, layouts)
+        self._log_ends = _shared(layouts // 16, np.int64)
+        self._log_count = _shared(1, np.int64)
+        self._log_lock = context.Lock()
+
+        self._layouts: list[tuple[A_inv, ...]] = []
+        self._slots: list[dict[A_inv, int]] = []
+        self._ids: dict[tuple[A_inv, ...], int] = {}
+
+    @classmethod
+    def of(cls, table: Mapping[I, Mapping[A_inv, float]], **kwargs) -> SharedTable:
+        shared = cls(**kwargs)
+        for infoset, row in table.items():
+            shared[infoset] = row
+        return shared
+
+    def _read_log(self):
+        for j in range(len(self._layouts), int(self._log_count[0])):
+            start = self._log_ends[j - 1] if j else 0
+            actions = pickle.loads(self._log[start : self._log_ends[j]])
+
+            self._layouts.append(actions)
+            self._slots.append({action: i for i, action in enumerate(actions)})
+            self._ids[actions] = j
+
+    def _layout(self, actions: tuple[A_inv, ...]) -> int:
+        layout = self._ids.get(actions)
+        if layout is not None:
+            return layout
+
+        with self._log_lock:
+            self._read_log()
+            if actions in self._ids:
+                return self._ids[actions]
+
+            count = int(self._log_count[0])
+            if count == len(self._log_ends) or count > _LAYOUT_MASK:
+                raise OverflowError("too many distinct action layouts")
+
+            start = self._log_ends[count - 1] if count else 0
+            record = pickle.dumps(actions)
+            if start + len(record) > len(self._log):
+                raise OverflowError("action layout log is full")
+
+            self._log[start : start + len(record)] = record
+            self._log_ends[count] = start + len(record)
+            self._log_count[0] = count + 1  # publish
+
+        self._read_log()
+        return self._ids[actions]
+
+    def _entry(self, infoset: object) -> int:
+        i = self.index.get(infoset)  # type: ignore
+        if i is None or self._entries[i] < 0:
+            raise KeyError(infoset)
+        return int(self._entries[i])
+
+    def __getitem__(self, infoset: I) -> Row[A_inv]:
+        entry = self._entry(infoset)
+
+        layout = entry & _LAYOUT_MASK
+        if layout >= len(self._slots):
+            self._read_log()
+        return Row(self, entry >> _LAYOUT_BITS, self._slots[layout])  # type: ignore
+
+    def __setitem__(self, infoset: I, row: Mapping[A_inv, float]):
+        actions = tuple(row)
+        layout = self._layout(actions)
+        i = self.index.add(infoset)
+
+        if self._entries[i] < 0:
+            with self._lock:
+                # another process may have created the row meanwhile
+                if self._entries[i] < 0:
+                    self._insert(i, layout, len(actions))
+
+        entry = int(self._entries[i])
+        if entry & _LAYOUT_MASK != layout:
+            raise ValueError(f"{infoset} was created with another layout")
+
+        offset = entry >> _LAYOUT_BITS
+        values = np.fromiter(row.values(), dtype=self._data.dtype, count=len(actions))
+        values = _stored(values, self._scale, self._negative)
+        self._data[offset : offset + len(actions)] = values
+
+    def _insert(self, i: int, layout: int, n: int):
+        top = int(self._top[0])
+        if top + n > len(self._data):
+            raise MemoryError("shared table is full, increase its capacity")
+
+        self._top[0] = top + n
+        self._count[0] += 1
+        self._entries[i] = top << _LAYOUT_BITS | layout  # publish
+
+    def __delitem__(self, infoset: I):
+        raise TypeError("shared tables do not support deletion")
+
+    def __contains__(self, infoset: object) -> bool:
+        i = self.index.get(infoset)  # type: ignore
+        return i is not None and self._entries[i] >= 0
+
+    def __iter__(self) -> Iterator[I]:
+        # only rows of infosets known to this process
+        entries = self._entries
+        return (infoset for i, infoset in self.index.known() if entries[i] >= 0)
+
+    def __len__(self) -> int:
+        return int(self._count[0])
+
+    @property
+    def _scale(self) -> float:
+        return self._scales[0]
+
+    @property
+    def _negative(self) -> float:
+        return self._scales[1]
+
+    def scale(self, factor: float, negative: Optional[float] = None):
+        # unlike tables, shared tables do not fold the scales themselves:
+        # workers would read and write rows in the middle of the fold
+        self._scales *= (factor, factor if negative is None else negative)
+
+    @property
+    def unsettled(self) -> bool:
+        return bool(self._scales.min() < _RESCALE)
+
+    def settle(self):
+        # folds the scales into the values ; no other process may use the
+        # table meanwhile (see `hogwild`)
+        data = self._data[: self._top[0]]
+        data[:] = _scaled(data, self._scale, self._negative)
+        self._scales[:] = 1.0
+
+    def snapshot(self, index: Optional[InfosetIndex[I]] = None) -> Table[I, A_inv]:
+        # rows are read while workers update them, as they read each other's
+        table: Table[I, A_inv] = Table(index=index)
+        for i, infoset in self.index.known():
+            entry = int(self._entries[i])
+            if entry < 0:
+                continue
+
+            if entry & _LAYOUT_MASK >= len(self._layouts):
+                self._read_log()
+            offset = entry >> _LAYOUT_BITS
+            actions = self._layouts[entry & _LAYOUT_MASK]
+            values = self._data[offset : offset + len(actions)]
+            values = _scaled(values, self._scale, self._negative)
+            table[infoset] = dict(zip(actions, values))
+        return table
+
+    def __reduce__(self):
+        # checkpoints are plain tables, loadable without any shared memory.
+        # tables pickled together share the index of their snapshots
+        return _table, (self.snapshot(self.index.local()).__getstate__(),)
+
+
+def _table(state: dict[str, Any]) -> Table:
+    table = Table.__new__(Table)
+    table.__setstate__(state)
+    return table
+
+
+_TABLES = ("regrets", "strategies")
+
+
+def _worker(
+    worker: int,
+    runner: Runner,
+    counters: npt.NDArray[np.int64],
+    pauses: npt.NDArray[np.int64],
+    stop: Any,
+    go: Any,
+):
+    # forked processes share the parent's random state
+    random.seed()
+    np.random.seed()
+
+    impl, game = runner.impl, runner.game
+    touched, iterations, start = impl.touched, 0, impl.iterations
+
+    while not stop.is_set():
+        if not go.is_set():
+            # parked between iterations until the parent resumes
+            counters[worker, 2] = pauses[0]
+            go.wait(1)
+            continue
+
+        # the iterations of every worker, for the pruning warm-up
+        impl.iterations = start + int(counters[:, 0].sum())
+        for p in range(game.players):
+            impl.walk(game(), Player(p), impl.regrets, impl.strategies)
+
+        iterations += 1
+        counters[worker, 0] = iterations
+        counters[worker, 1] = impl.touched - touched
+
+
+def _settle(
+    impl: Any,
+    workers: list,
+    counters: npt.NDArray[np.int64],
+    pauses: npt.NDArray[np.int64],
+    go: Any,
+):
+    # folds the scales of the shared tables once they get small, with every
+    # worker parked between two iterations
+    tables = [getattr(impl, name) for name in _TABLES]
+    if not any(table.unsettled for table in tables):
+        return
+
+    pauses[0] += 1
+    go.clear()
+    try:
+        pause = pauses[0]
+        for w, worker in enumerate(workers):
+            while counters[w, 2] != pause and worker.is_alive():
+                time.sleep(0.001)
+
+        for table in tables:
+            table.settle()
+    finally:
+        go.set()
+
+
+def _check(impl: Any):
+    # workers run external sampling traversals, calling `walk` directly. they
+    # keep `iterations` roughly up to date, but an iteration counter that
+    # weighs the updates (as CFR+ weighs its strategies) must be exact
+    name = type(impl).__name__
+    walk = getattr(impl, "walk", None)
+    params = list(inspect.signature(walk).parameters) if walk is not None else []
+    if params != ["game", "player", "regrets", "strategies"]:
+        raise TypeError(f"{name} is not an external sampling algorithm")
+    if hasattr(impl, "t"):
+        raise TypeError(f"{name} weighs its updates by iteration, as workers cannot")
+    if not hasattr(impl, "iterations"):
+        raise TypeError(f"{name} does not count its iterations")
+
+
+def hogwild(runner: Runner):
+    impl, game = runner.impl, runner.game
+    _check(impl)
+    context = mp.get_context("fork")
+
+    index: Optional[SharedInfosetIndex] = None
+    for name in _TABLES:
+        table = getattr(impl, name)
+        if isinstance(table, SharedTable):
+            index = table.index
+
+    # both tables share an index, from which checkpoints read every infoset
+    index = index or SharedInfosetIndex(runner.capacity, context)
+    for name in _TABLES:
+        table = getattr(impl, name)
+        if not isinstance(table, SharedTable):
+            shared = SharedTable.of(
+                table, rows=runner.capacity, context=context, index=index
+            )
+            setattr(impl, name, shared)
+
+    # iterations, touched nodes and the last pause each worker parked for ;
+    # `pauses` numbers the pauses
+    counters = _shared(3 * runner.workers, np.int64).reshape(runner.workers, 3)
+    pauses = _shared(1, np.int64)
+    stop, go = context.Event(), context.Event()
+    go.set()
+
+    workers = [
+        context.Process(target=_worker, args=(w, runner, counters, pauses, stop, go))
+        for w in range(runner.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # the parent only aggregates counters, discounts and checkpoints ; it
+    # logs every `runner.logging` seconds
+    start = last = time.monotonic()
+    iterations = touched = saved = ticks = 0
+    logged = (0, 0)
+
+    try:
+        while iterations < runner.until:
+            time.sleep(1)
+            ticks += 1
+
+            if not any(worker.is_alive() for worker in workers):
+                raise RuntimeError("every worker has exited")
+
+            its, tch = (int(x) for x in counters[:, :2].sum(axis=0))
+            delta, touched = tch - touched, tch
+
+            impl.touched += delta
+            impl.iterations += its - iterations
+            after = getattr(impl, "_after", None)
+            if after is not None:
+                after(delta)
+            _settle(impl, workers, counters, pauses, go)
+
+            if not ticks % runner.logging:
+                now = time.monotonic()
+                logger.info(
+                    "iteration",
+                    it=its,
+                    touched=impl.touched,
+                    infosets=len(impl.regrets),
+                    its_per_sec=round((its - logged[0]) / (now - last), 1),
+                    touched_per_sec=round((tch - logged[1]) / (now - last)),
+                    elapsed=round(now - start),
+                )
+                logged, last = (its, tch), now
+
+            iterations = its
+
+            checkpt = runner.checkpt
+            if checkpt is not None and iterations // checkpt > saved:
+                saved = iterations // checkpt
+                runner.save()
+
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,136 @@
+from typing import Any, Callable, Optional, Protocol
+import random
+
+from ..game import Game, Player, I, A_inv
+from .matching import matching
+
+
+# the `walk` methods of external sampling recurse once per node, which bounds
+# the depth of the game by the recursion limit and passes the same arguments
+# down at every node. `traverse` runs the same traversal on an explicit stack
+# instead: only the traverser's nodes, which wait for the values of all their
+# children, get a frame ; the innermost one lives in local variables and the
+# ones waiting for it are pushed as tuples, which is cheaper in cpython than
+# reusing frame objects. `bench walk` compares both.
+#
+# it follows the update rules of `ESCFR`, `ESLCFR` and `ESDCFR` (lazy
+# discounting, pruning), drawing random numbers in the same order as `walk`,
+# so that both give the same tables. set `iterative=True` to use it. `ESCFRP`
+# is left out: it weighs strategies by the iteration and clips regrets at
+# the opponent's nodes, and is not meant for games deep enough to need it.
+
+
+class Traversable(Protocol):
+    touched: int
+    iterations: int
+
+    prune: float
+    prune_below: float
+    prune_after: int
+
+    # discounts the rows of an infoset up to date before they are used, None
+    # when rows are never discounted lazily
+    @property
+    def _catch_up(self) -> Optional[Callable[..., None]]:
+        ...
+
+
+def traverse(
+    impl: Traversable,
+    game: Game[A_inv, I],
+    player: Player,
+    regrets: dict[I, dict[A_inv, float]],
+    strategies: dict[I, dict[A_inv, float]],
+) -> float:
+    catch_up = impl._catch_up
+    lazy = catch_up is not None and (
+        isinstance(regrets, dict) or isinstance(strategies, dict)
+    )
+    prune, below, after = impl.prune, impl.prune_below, impl.prune_after
+
+    # the innermost frame lives in locals, the frames waiting for it are
+    # pushed on `stack`
+    stack: list[tuple] = []
+    frame: Any = None
+    R: Any = None
+    explored: Any = None
+    strategy: Any = None
+    cfs: list[float] = []
+    i, total = 0, 0.0
+
+    touched = 0
+    node: Any = game
+
+    while True:
+        # descend until a terminal node gives a value
+        while True:
+            touched += 1
+
+            if node.terminal:
+                value = node.payoff(player)
+                break
+
+            if node.chance:
+                node = node.apply(node.sample())
+                continue
+
+            infoset = node.infoset(node.active)
+            actions = infoset.actions()
+
+            if infoset not in regrets:
+                regrets[infoset] = {action: 0 for action in actions}
+            if infoset not in strategies:
+                strategies[infoset] = {action: 0 for action in actions}
+
+            regret = regrets[infoset]
+            S = strategies[infoset]
+            if lazy:
+                catch_up(infoset, regret, S)
+
+            probs = matching(regret.values())
+
+            if node.active != player:
+                (action,) = random.choices(actions, weights=probs)
+                for a, p in zip(actions, probs):
+                    S[a] += p
+
+                node = node.apply(action)
+                continue
+
+            if frame is not None:
+                stack.append((frame, R, explored, strategy, cfs, i, total))
+
+            # the actions to explore are known upfront: the regrets of an
+            # infoset do not change in its own subtree
+            frame, R, explored, strategy = node, regret, actions, probs
+            if prune and impl.iterations >= after and random.random() < prune:
+                pairs = [(a, p) for a, p in zip(actions, probs) if p or R[a] >= below]
+                explored = [a for a, _ in pairs]
+                strategy = [p for _, p in pairs]
+
+            cfs, i, total = [], 0, 0.0
+            node = node.apply(explored[0])
+
+        # ascend, handing the value to the frames until one has children left
+        while frame is not None:
+            cfs.append(value)
+            total += strategy[i] * value
+
+            i += 1
+            if i < len(explored):
+                node = frame.apply(explored[i])
+                break
+
+            # the regrets of pruned actions are left as they are
+            for action, cf in zip(explored, cfs):
+                R[action] += cf - total
+            value = total
+
+            if stack:
+                frame, R, explored, strategy, cfs, i, total = stack.pop()
+            else:
+                frame = None
+
+        if frame is None:
+            impl.touched += touched
+            return value
@@ -0,0 +1,230 @@
+import numpy as np
+import numpy.typing as npt
+
+from typing import Generic, Iterator, Mapping, MutableMapping
+from typing import Any, Optional
+
+from ..abstraction import _InfoSet
+from ..index import InfosetIndex
+from ..game import A_inv, I
+
+
+# storing regrets and strategies as dict[I, dict[A_inv, float]] costs a dict
+# per infoset and a boxed float per action. a table instead keeps every row in
+# one contiguous float array and only maps infosets to a row offset ; rows are
+# handed out as small mutable views so that the `walk` methods of the
+# algorithms work unchanged.
+#
+# usage: index = InfosetIndex()
+#        ESLCFR(regrets=Table(index=index), strategies=Table(index=index))
+
+
+# the entry of an infoset is `offset << _LAYOUT_BITS | layout` which keeps a
+# single small int per row
+_LAYOUT_BITS = 20
+_LAYOUT_MASK = (1 << _LAYOUT_BITS) - 1
+
+# tables are scaled lazily: values are stored divided by a global scale, so
+# that discounting every row (as LCFR does) is constant time. negative values
+# have a scale of their own (DCFR discounts them differently) ; a stored value
+# keeps the sign of the value. the scales are folded back into the values
+# before they get small enough to lose precision
+_RESCALE = 2.0 ** -64
+
+
+def _scaled(values: npt.NDArray[Any], scale: float, negative: float):
+    if scale == negative:
+        return values if scale == 1 else values * scale
+    return np.where(values > 0, values * scale, values * negative)
+
+
+def _stored(values: npt.NDArray[Any], scale: float, negative: float):
+    if scale == negative:
+        return values / scale
+    return np.where(values > 0, values / scale, values / negative)
+
+
+class Row(MutableMapping[A_inv, float]):
+    __slots__ = ("_table", "_offset", "_slots")
+
+    # the table is kept rather than its array: the array is reallocated when
+    # the table grows, which happens during the walk while rows are held
+    def __init__(self, table: "Table", offset: int, slots: dict[A_inv, int]):
+        self._table = table
+        self._offset = offset
+        self._slots = slots
+
+    def __getitem__(self, action: A_inv) -> float:
+        table = self._table
+        value = table._data[self._offset + self._slots[action]]
+        return value * (table._scale if value > 0 else table._negative)
+
+    def __setitem__(self, action: A_inv, value: float):
+        table = self._table
+        scale = table._scale if value > 0 else table._negative
+        table._data[self._offset + self._slots[action]] = value / scale
+
+    def __delitem__(self, action: A_inv):
+        raise TypeError("table rows have a fixed layout")
+
+    def __iter__(self) -> Iterator[A_inv]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def values(self) -> npt.NDArray[Any]:  # type: ignore[override]
+        # contiguous view on the row, in the order of the actions, unless the
+        # table is scaled
+        table = self._table
+        values = table._data[self._offset : self._offset + len(self._slots)]
+        return _scaled(values, table._scale, table._negative)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class Table(MutableMapping[I, Row[A_inv]], Generic[I, A_inv]):
+    def __init__(
+        self,
+        chunk: int = 2 ** 20,
+        dtype: npt.DTypeLike = np.float64,
+        index: Optional[InfosetIndex[I]] = None,
+    ):
+        self.chunk = chunk
+
+        # rows by infoset id, the regret and strategy tables of an algorithm
+        # should share their index
+        self.index: InfosetIndex[I] = InfosetIndex() if index is None else index
+        self._entries: list[int] = []  # -1 when the infoset has no row here
+        self._count = 0
+
+        self._data = np.zeros(chunk, dtype=dtype)
+        self._size = 0
+        self._scale = self._negative = 1.0
+
+        # layouts are the distinct action tuples ; there are few of them
+        self._layouts: list[tuple[A_inv, ...]] = []
+        self._slots: list[dict[A_inv, int]] = []
+        self._ids: dict[tuple[A_inv, ...], int] = {}
+
+    def _layout(self, actions: tuple[A_inv, ...]) -> int:
+        layout = self._ids.get(actions)
+        if layout is None:
+            layout = len(self._layouts)
+            if layout > _LAYOUT_MASK:
+                raise OverflowError("too many distinct action layouts")
+
+            self._layouts.append(actions)
+            self._slots.append({action: i for i, action in enumerate(actions)})
+            self._ids[actions] = layout
+
+        return layout
+
+    def _allocate(self, n: int) -> int:
+        offset = self._size
+        if offset + n > len(self._data):
+            # grow by whole chunks, at least by half the current capacity
+            need = offset + n - len(self._data)
+            grow = max(need, len(self._data) // 2)
+            grow = -(-grow // self.chunk) * self.chunk
+
+            data = np.zeros(len(self._data) + grow, dtype=self._data.dtype)
+            data[:offset] = self._data[:offset]
+            self._data = data
+
+        self._size += n
+        return offset
+
+    def _entry(self, infoset: object) -> int:
+        i = self.index._ids.get(infoset)  # type: ignore
+        entries = self._entries
+        if i is None or i >= len(entries) or entries[i] < 0:
+            raise KeyError(infoset)
+        return entries[i]
+
+    def __getitem__(self, infoset: I) -> Row[A_inv]:
+        entry = self._entry(infoset)
+        return Row(self, entry >> _LAYOUT_BITS, self._slots[entry & _LAYOUT_MASK])
+
+    def __setitem__(self, infoset: I, row: Mapping[A_inv, float]):
+        actions = tuple(row)
+        layout = self._layout(actions)
+
+        i = self.index.add(infoset)
+        entries = self._entries
+        if i >= len(entries):
+            entries.extend([-1] * (i + 1 - len(entries)))
+
+        entry = entries[i]
+        if entry < 0 or entry & _LAYOUT_MASK != layout:
+            self._count += entry < 0
+            entry = self._allocate(len(actions)) << _LAYOUT_BITS | layout
+            entries[i] = entry
+
+        offset = entry >> _LAYOUT_BITS
+        values = np.fromiter(row.values(), dtype=self._data.dtype, count=len(actions))
+        values = _stored(values, self._scale, self._negative)
+        self._data[offset : offset + len(actions)] = values
+
+    def __delitem__(self, infoset: I):
+        # the row's storage is not reclaimed, nor the infoset's id
+        self._entry(infoset)
+        self._entries[self.index._ids[infoset]] = -1
+        self._count -= 1
+
+    def __contains__(self, infoset: object) -> bool:
+        i = self.index._ids.get(infoset)  # type: ignore
+        return i is not None and i < len(self._entries) and self._entries[i] >= 0
+
+    def __iter__(self) -> Iterator[I]:
+        infoset = self.index.infoset
+        return (infoset(i) for i, entry in enumerate(self._entries) if entry >= 0)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def scale(self, factor: float, negative: Optional[float] = None):
+        # negative values are scaled by `factor` too unless `negative` is given
+        self._scale *= factor
+        self._negative *= factor if negative is None else negative
+        if min(self._scale, self._negative) < _RESCALE:
+            self.settle()
+
+    def settle(self):
+        # folds the scales into the values, for code reading `_data` directly
+        if self._scale != 1 or self._negative != 1:
+            data = self._data[: self._size]
+            data[:] = _scaled(data, self._scale, self._negative)
+            self._scale = self._negative = 1.0
+
+    def spans(self) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        # offsets and lengths of every row, in iteration order ; this is what
+        # the batched kernels (e.g. `matchings`) consume. the rows are stored
+        # divided by the table's scales
+        entries = np.array(self._entries, np.int64)
+        entries = entries[entries >= 0]
+        lengths = np.array([len(layout) for layout in self._layouts], np.int64)
+        return entries >> _LAYOUT_BITS, lengths[entries & _LAYOUT_MASK]
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_data"] = self._data[: self._size].copy()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault("_scale", 1.0)
+        self.__dict__.setdefault("_negative", 1.0)
+
+        # abstract infosets are unpickled without their actions
+        infoset = self.index.infoset
+        for i, entry in enumerate(self._entries):
+            if entry >= 0:
+                restored = infoset(i)
+                if isinstance(restored, _InfoSet) and restored._saved_actions is None:
+                    restored._saved_actions = self._layouts[entry & _LAYOUT_MASK]
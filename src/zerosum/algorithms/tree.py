@@ -0,0 +1,275 @@
+from numba import njit
+import numpy.typing as npt
+import numpy as np
+
+from typing import Any, Generic, Optional
+from dataclasses import dataclass, field
+from collections import deque
+
+from ..game import Game, Player, A_inv, I
+from .table import Table, _LAYOUT_BITS
+from .matching import _matchings
+
+
+# full traversal CFR rebuilds every game state and recomputes every infoset on
+# every iteration even though the tree never changes. small games can instead
+# be compiled once to flat arrays, nodes in breadth first order so that
+# parents come before their children and siblings are contiguous ; CFR and
+# CFR+ then run as two compiled passes over the arrays.
+
+TERMINAL, CHANCE, DECISION = 0, 1, 2
+
+
+@dataclass
+class Tree(Generic[A_inv, I]):
+    kind: npt.NDArray[np.int8]
+    player: npt.NDArray[np.int8]  # active player of decision nodes
+    parent: npt.NDArray[np.int64]
+    first: npt.NDArray[np.int64]  # first child
+    count: npt.NDArray[np.int64]  # number of children
+    infoset: npt.NDArray[np.int64]  # index of the infoset of decision nodes
+    prob: npt.NDArray[np.float64]  # probability of chance children
+    payoffs: npt.NDArray[np.float64]  # payoffs of terminals, per player
+
+    infosets: list[I]
+    actions: list[tuple[A_inv, ...]]
+
+    def __len__(self):
+        return len(self.kind)
+
+
+def compile_tree(game: type[Game[A_inv, I]]) -> Tree[A_inv, I]:
+    kind, player, parent, first, count = [], [], [], [], []
+    infoset, prob, payoffs = [], [], []
+
+    ids: dict[I, int] = {}
+    infosets: list[I] = []
+    actions: list[tuple[A_inv, ...]] = []
+
+    queue: deque[tuple[Game[A_inv, I], int, float]] = deque()
+    queue.append((game.default(), -1, 1.0))
+    enqueued = 1
+
+    while queue:
+        state, up, p = queue.popleft()
+        parent.append(up)
+        prob.append(p)
+        index = len(kind)
+
+        if state.terminal:
+            kind.append(TERMINAL)
+            player.append(-1)
+            infoset.append(-1)
+            payoffs.append(tuple(state.payoff(Player(q)) for q in range(game.players)))
+            first.append(enqueued)
+            count.append(0)
+            continue
+
+        payoffs.append((0.0,) * game.players)
+
+        if state.chance:
+            children = [
+                (state.apply(action), index, q) for action, q in state.chances().items()
+            ]
+            kind.append(CHANCE)
+            player.append(-1)
+            infoset.append(-1)
+
+        else:
+            iset = state.infoset(state.active)
+            acts = tuple(iset.actions())
+
+            if iset not in ids:
+                ids[iset] = len(infosets)
+                infosets.append(iset)
+                actions.append(acts)
+            elif actions[ids[iset]] != acts:
+                raise ValueError(f"actions of {iset} are inconsistent")
+
+            children = [(state.apply(action), index, 1.0) for action in acts]
+            kind.append(DECISION)
+            player.append(state.active)
+            infoset.append(ids[iset])
+
+        first.append(enqueued)
+        count.append(len(children))
+        queue.extend(children)
+        enqueued += len(children)
+
+    return Tree(
+        np.asarray(kind, dtype=np.int8),
+        np.asarray(player, dtype=np.int8),
+        np.asarray(parent, dtype=np.int64),
+        np.asarray(first, dtype=np.int64),
+        np.asarray(count, dtype=np.int64),
+        np.asarray(infoset, dtype=np.int64),
+        np.asarray(prob, dtype=np.float64),
+        np.asarray(payoffs, dtype=np.float64).reshape(-1, game.players),
+        infosets,
+        actions,
+    )
+
+
+@njit(cache=True)
+def _iteration(
+    kind,
+    active,
+    first,
+    count,
+    offset,
+    prob,
+    payoffs,
+    regrets,
+    strategies,
+    strategy,
+    reach,
+    values,
+    player,
+    weight,
+    plus,
+):
+    n = len(kind)
+    opponent = 1 - player
+
+    # reach probabilities, chance is folded into the opponent's
+    reach[0, 0] = reach[0, 1] = 1.0
+    for node in range(n):
+        if kind[node] == TERMINAL:
+            continue
+
+        for i in range(count[node]):
+            child = first[node] + i
+            reach[child, 0] = reach[node, 0]
+            reach[child, 1] = reach[node, 1]
+
+            if kind[node] == CHANCE:
+                reach[child, opponent] *= prob[child]
+            else:
+                reach[child, active[node]] *= strategy[offset[node] + i]
+
+    # counterfactual values, children before their parents
+    for node in range(n - 1, -1, -1):
+        if kind[node] == TERMINAL:
+            values[node] = payoffs[node, player]
+            continue
+
+        value = 0.0
+        for i in range(count[node]):
+            child = first[node] + i
+            if kind[node] == CHANCE:
+                value += prob[child] * values[child]
+            else:
+                value += strategy[offset[node] + i] * values[child]
+        values[node] = value
+
+        if kind[node] != DECISION or active[node] != player:
+            continue
+
+        for i in range(count[node]):
+            slot = offset[node] + i
+            regrets[slot] += reach[node, opponent] * (values[first[node] + i] - value)
+            strategies[slot] += weight * reach[node, player] * strategy[slot]
+
+    # rm+ clips the regrets of whole infosets, once every history has been
+    # accounted for. the other player's regrets are already positive
+    if plus:
+        for slot in range(len(regrets)):
+            regrets[slot] = max(0.0, regrets[slot])
+
+    return values[0]
+
+
+@dataclass
+class TreeCFR(Generic[A_inv, I]):
+    # vanilla CFR, or CFR+ with `plus`, over a compiled tree. only two player
+    # games small enough to fit in memory are supported.
+    #
+    # these are the textbook updates: the strategies are fixed for a whole
+    # pass and rm+ clips the regrets once it is done. `CFR` and `CFRP` update
+    # rows in place in the middle of their traversals, which makes them
+    # different algorithms with their own trajectories (regrets several units
+    # apart after 200 iterations of Kuhn), not interchangeable implementations
+    plus: bool = False
+
+    regrets: Table[I, A_inv] = field(default_factory=Table)
+    strategies: Table[I, A_inv] = field(default_factory=Table)
+    touched: int = 0
+    t: int = 1
+
+    _game: Optional[type] = field(default=None, repr=False)
+    _arrays: Optional[tuple[Any, ...]] = field(default=None, repr=False)
+
+    def _compile(self, game: type[Game[A_inv, I]]):
+        if game.players != 2:
+            raise ValueError(f"TreeCFR needs a two player game, not {game.players}")
+
+        tree = compile_tree(game)
+        for iset, actions in zip(tree.infosets, tree.actions):
+            if iset not in self.regrets:
+                self.regrets[iset] = {action: 0 for action in actions}
+            if iset not in self.strategies:
+                self.strategies[iset] = {action: 0 for action in actions}
+
+        # regrets and strategies are allocated in the same order
+        rows = np.array(
+            [self.regrets._entry(iset) >> _LAYOUT_BITS for iset in tree.infosets]
+            + [-1],
+            dtype=np.int64,
+        )
+        if not np.array_equal(
+            rows[:-1],
+            [self.strategies._entry(i) >> _LAYOUT_BITS for i in tree.infosets],
+        ):
+            raise ValueError("regrets and strategies have different layouts")
+
+        lengths = np.array([len(actions) for actions in tree.actions], np.int64)
+        offset = rows[tree.infoset]
+
+        # scratch arrays, reused by every pass
+        strategy = np.zeros(self.regrets._size)
+        reach, values = np.empty((len(tree), 2)), np.empty(len(tree))
+
+        self._game = game
+        self._arrays = (tree, offset, rows[:-1], lengths, strategy, reach, values)
+
+    def _run_iteration(self, game: type[Game[A_inv, I]]):
+        if self._game is not game or self._arrays is None:
+            self._compile(game)
+
+        arrays = self._arrays
+        assert arrays is not None
+
+        tree, offset, rows, lengths, strategy, reach, values = arrays
+        self.regrets.settle()
+        self.strategies.settle()
+        regrets = self.regrets._data[: self.regrets._size]
+        strategies = self.strategies._data[: self.strategies._size]
+
+        for p in range(game.players):
+            _matchings(regrets, rows, lengths, strategy)
+            _iteration(
+                tree.kind,
+                tree.player,
+                tree.first,
+                tree.count,
+                offset,
+                tree.prob,
+                tree.payoffs,
+                regrets,
+                strategies,
+                strategy,
+                reach,
+                values,
+                p,
+                self.t if self.plus else 1,
+                self.plus,
+            )
+            self.touched += len(tree)
+
+        self.t += 1
+
+    def __getstate__(self):
+        # the tree is compiled again when needed
+        state = self.__dict__.copy()
+        state["_game"] = state["_arrays"] = None
+        return state
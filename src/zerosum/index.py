@@ -0,0 +1,60 @@
+from typing import Generic, Hashable, Iterator, Optional
+
+from .abstraction import _InfoSet
+from .game import I
+
+
+# assigns contiguous ids to infosets, in the order they are first seen. tables
+# store their rows by id, and the regret and strategy tables of an algorithm
+# can share a single index.
+#
+# abstract infosets are pickled as their abstract state only: neither the
+# `_InfoSet` objects nor their actions (which tables keep as layouts) are
+# saved.
+
+
+def key(infoset: Hashable) -> Hashable:
+    if isinstance(infoset, _InfoSet):
+        return infoset.key
+    return infoset
+
+
+class InfosetIndex(Generic[I]):
+    def __init__(self):
+        self._ids: dict[I, int] = {}
+        self._infosets: list[I] = []
+
+    def __len__(self) -> int:
+        return len(self._infosets)
+
+    def __contains__(self, infoset: object) -> bool:
+        return infoset in self._ids
+
+    def __iter__(self) -> Iterator[I]:
+        # in id order
+        return iter(self._infosets)
+
+    def get(self, infoset: I) -> Optional[int]:
+        return self._ids.get(infoset)
+
+    def add(self, infoset: I) -> int:
+        i = self._ids.get(infoset)
+        if i is None:
+            i = self._ids[infoset] = len(self._infosets)
+            self._infosets.append(infoset)
+        return i
+
+    def infoset(self, i: int) -> I:
+        return self._infosets[i]
+
+    def __getstate__(self):
+        abstract = bool(self._infosets) and isinstance(self._infosets[0], _InfoSet)
+        return [key(infoset) for infoset in self._infosets], abstract
+
+    def __setstate__(self, state):
+        keys, abstract = state
+        if abstract:
+            keys = [_InfoSet.restore(k) for k in keys]
+
+        self._infosets = keys
+        self._ids = {infoset: i for i, infoset in enumerate(keys)}
@@ -1,18 +1,19 @@
 import eval7
 
 from typing import cast
-from typing import Callable
+from typing import Callable, Optional
 from dataclasses import dataclass
 from functools import lru_cache
 import math
 
 from ...abstraction import algebraic
 from ...game import InfoSet as PInfoSet
-from ..game import InfoSet, Action, RiverOfBlood
+from ..game import InfoSet, Action, ActionSpace, RiverOfBlood
 from ..game import Allin, RaiseHalfPot, Raise75Pot, RaisePot
 from ..game import Bet, Call, Check, Fold
 from ..game import Draw, Flop, Turn, River, Run
 from .hands import hs
+from .isomorphism import index as iso, unindex
 
 
 _cards = eval7.Deck().cards
@@ -24,6 +25,12 @@ def pseudoharmonic(x: int, A: int, B: int) -> float:
 
 _bet_action = (Bet, Allin, RaiseHalfPot, Raise75Pot, RaisePot)
 
+# bounds of the values of the state abstractions
+STREETS = 49  # at most 48 community cards
+POT = 800
+
+_non_bets = ((Check(),), (Fold(), Call()))
+
 
 @dataclass(frozen=True)
 class Translation(RiverOfBlood):
@@ -80,8 +87,19 @@ class Translation(RiverOfBlood):
         if self.chance:
             return action
 
+        actions = self.infoset(self.active).actions()
+        if isinstance(actions, ActionSpace):
+            # the most similar bet of the range is the one of closest amount,
+            # no other bet needs to be looked at
+            candidates = actions.head
+            if isinstance(action, _bet_action):
+                bet = min(max(self._qty_of(action), actions.lb), actions.ub)
+                candidates = (*candidates, Bet(bet))
+        else:
+            candidates = tuple(actions)
+
         sim, best = -2, None
-        for other in self.infoset(self.active).actions():
+        for other in candidates:
             s = self._similarity(action, other)
             if s > sim:
                 sim, best = s, other
@@ -91,7 +109,7 @@ class Translation(RiverOfBlood):
         return RiverOfBlood.apply(self, self.translate(action))
 
 
-@algebraic
+@algebraic(domain=((False, False), (True, False), (True, True)))
 def will_have_run(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     if len(infoset.community) >= 5:
@@ -99,13 +117,13 @@ def will_have_run(infoset: PInfoSet):
     return (False, False)
 
 
-@algebraic
+@algebraic(domain=range(STREETS))
 def street(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     return len(infoset.community)
 
 
-@algebraic
+@algebraic(domain=(0, 1))
 def player(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     return infoset.player
@@ -116,29 +134,28 @@ def player(infoset: PInfoSet):
 # should always be abstracted in the same way
 # otherwise bad things happen
 @lru_cache(maxsize=2 ** 24)
-def _ehs(
-    hand: tuple[eval7.Card, eval7.Card],
-    community: tuple[eval7.Card, ...],
-    buckets: int,
-):
-    strength = hs(hand, community, 200)
+def _ehs(street: int, index: int, buckets: int):
+    # keyed on the isomorphism index, so that isomorphic hands share a bucket
+    hand, community = unindex(street, index)
+    strength = hs(
+        (_cards[hand[0]], _cards[hand[1]]), tuple(_cards[i] for i in community), 200
+    )
     return round(strength * buckets)
 
 
 def ehs(buckets: int):
-    @algebraic
+    @algebraic(domain=range(buckets + 1))
     def inner(infoset: PInfoSet):
         infoset = cast(InfoSet, infoset)
-        hand = (_cards[infoset.hand[0]], _cards[infoset.hand[1]])
-        community = tuple(_cards[i] for i in infoset.community)
+        street = len(infoset.community)
 
         # must be cached !!
-        return _ehs(hand, community, buckets)
+        return _ehs(street, iso(infoset.hand, infoset.community), buckets)
 
     return inner
 
 
-@algebraic
+@algebraic(domain=(False, True))
 def singlebet(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     return _alreadybet(infoset)
@@ -160,7 +177,7 @@ _chance_action = (Draw, Flop, Turn, River, Run)
 
 
 def how_many_bets(cap: int):
-    @algebraic
+    @algebraic(domain=range(cap + 1))
     def how_many_bets(infoset: PInfoSet):
         infoset = cast(InfoSet, infoset)
         return min(cap, _bets(infoset))
@@ -203,7 +220,7 @@ def _linear_unbucket(qty: int, base: int) -> int:
 
 
 def pot(base: int):
-    @algebraic
+    @algebraic(domain=(0, *(base ** i for i in range(_bucket(POT, base) + 1))))
     def inner(infoset: PInfoSet):
         infoset = cast(InfoSet, infoset)
         return _unbucket(_bucket(infoset.pot, base), base)
@@ -211,7 +228,7 @@ def pot(base: int):
     return inner
 
 
-@algebraic
+@algebraic(domain=range(POT + 1))
 def justpot(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     return infoset.pot + sum(infoset.pips)
@@ -223,14 +240,14 @@ def justpips(infoset: PInfoSet):
     return infoset.pips
 
 
-@algebraic
+@algebraic(domain=range(POT // 2 + 1))
 def justcost(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     return max(infoset.pips) - min(infoset.pips)
 
 
 def linearcost(acc: int):
-    @algebraic
+    @algebraic(domain=range(acc + 1))
     def linearcost(infoset: PInfoSet):
         infoset = cast(InfoSet, infoset)
         cost = max(infoset.pips) - min(infoset.pips)
@@ -241,7 +258,7 @@ def linearcost(acc: int):
 
 
 def linearpot(base: int):
-    @algebraic
+    @algebraic(domain=(0, *(base * i for i in range(1, _linear_bucket(POT, base) + 1))))
     def inner(infoset: PInfoSet):
         infoset = cast(InfoSet, infoset)
         return _linear_unbucket(
@@ -271,14 +288,22 @@ def bounds(base: int):
     return inner
 
 
-@algebraic
+@algebraic(domain=[(a, b) for a in _non_bets for b in (True, False)])
 def non_bet_actions(infoset: PInfoSet):
     infoset = cast(InfoSet, infoset)
     return infoset._non_bet_actions()
 
 
+def _with_bets_domain(better: Callable) -> Optional[list[tuple[Action, ...]]]:
+    # known when the bet abstraction declares its domain
+    bets = getattr(better, "domain", None)
+    if bets is None:
+        return None
+    return [*_non_bets, *((*a, *b) for a in _non_bets for b in bets if b)]
+
+
 def withbets(better: Callable[[InfoSet], tuple[Action, ...]]):
-    @algebraic
+    @algebraic(domain=_with_bets_domain(better))
     def actions(infoset: PInfoSet) -> tuple[Action, ...]:
         infoset = cast(InfoSet, infoset)
         actions, bets = infoset._non_bet_actions()
@@ -292,7 +317,7 @@ def withbets(better: Callable[[InfoSet], tuple[Action, ...]]):
 
 
 def capped_bets(better: Callable[[InfoSet], tuple[Action, ...]], cap: int = 3):
-    @algebraic
+    @algebraic(domain=_with_bets_domain(better))
     def actions(infoset: PInfoSet) -> tuple[Action, ...]:
         infoset = cast(InfoSet, infoset)
         actions, bets = infoset._non_bet_actions()
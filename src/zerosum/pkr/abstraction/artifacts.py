@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import numpy.typing as npt
+import numpy as np
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+import pathlib
+import pickle
+import json
+
+
+# centroids are stored as `name.npy`, memory mapped when loaded so that every
+# process shares the pages, next to a `name.json` header saying how they were
+# made. loaded artifacts are cached, several abstractions using the same
+# centroids load them once. older `name.pkl` pickles are still read.
+
+VERSION = 1
+
+
+@dataclass(frozen=True)
+class Header:
+    street: int
+    clusters: int
+    dimension: int
+    metric: str
+    kind: str  # equity, potential, made, ochs
+    maxiter: Optional[int] = None  # of k-means
+    accuracy: Optional[int] = None  # monte carlo samples of the features
+    seed: Optional[int] = None
+    version: int = VERSION
+
+
+@dataclass(frozen=True)
+class Artifact:
+    centroids: npt.NDArray[np.float64]
+    header: Optional[Header]  # None for pickles
+
+
+def _base(path: str | pathlib.Path) -> pathlib.Path:
+    path = pathlib.Path(path)
+    return path.with_suffix("") if path.suffix in (".pkl", ".npy", ".json") else path
+
+
+def exists(path: str | pathlib.Path) -> bool:
+    base = _base(path)
+    return base.with_suffix(".npy").exists() or base.with_suffix(".pkl").exists()
+
+
+def save(path: str | pathlib.Path, centroids: npt.ArrayLike, **header: Any):
+    base = _base(path)
+    centroids = np.asarray(centroids, dtype=np.float64)
+    clusters, dimension = centroids.shape
+    h = Header(clusters=clusters, dimension=dimension, **header)
+
+    base.parent.mkdir(parents=True, exist_ok=True)
+    np.save(base.with_suffix(".npy"), centroids)
+    with open(base.with_suffix(".json"), "w") as f:
+        json.dump(h.__dict__, f, indent=2)
+
+
+@lru_cache(maxsize=None)
+def _load(base: pathlib.Path) -> Artifact:
+    npy, pkl = base.with_suffix(".npy"), base.with_suffix(".pkl")
+    if not npy.exists():
+        with open(pkl, "rb") as f:
+            return Artifact(np.asarray(pickle.load(f)), None)
+
+    with open(base.with_suffix(".json")) as f:
+        header = Header(**json.load(f))
+    if header.version > VERSION:
+        raise ValueError(f"{npy} has version {header.version}, expected {VERSION}")
+
+    centroids = np.load(npy, mmap_mode="r")
+    if centroids.shape != (header.clusters, header.dimension):
+        raise ValueError(f"{npy} holds {centroids.shape} centroids, header disagrees")
+    return Artifact(centroids, header)
+
+
+def load(path: str | pathlib.Path) -> Artifact:
+    return _load(_base(path).resolve())
+
+
+def centroids(path: str | pathlib.Path) -> npt.NDArray[np.float64]:
+    return load(path).centroids
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import numpy.typing as npt
+import numpy as np
+
+from typing import cast
+from typing import Callable, Optional, Sequence
+import pathlib
+
+from ...abstraction import algebraic, AlgebraicStateAbstraction
+from ...game import InfoSet as PInfoSet
+from ..game import InfoSet, Card
+from .isomorphism import index
+
+
+# card buckets computed offline (see `scripts/buckets.py`) so that training
+# only does an array lookup, and buckets agree between processes and runs.
+#
+# tables are per street and keyed on the isomorphism index of the hand and
+# board. a table is a pair of .npy files, sorted keys and their buckets, which
+# are memory mapped ; tables of fully enumerated streets are dense and only
+# store buckets.
+
+
+def key(hand: Sequence[Card], community: Sequence[Card]) -> int:
+    return index(hand, community)
+
+
+class BucketTable:
+    def __init__(
+        self,
+        keys: Optional[npt.NDArray[np.int64]],
+        buckets: npt.NDArray[np.int32],
+    ):
+        self.keys = keys  # None when dense
+        self.buckets = buckets
+
+    @classmethod
+    def build(cls, keys: Sequence[int], buckets: Sequence[int]) -> BucketTable:
+        k = np.array(keys, dtype=np.int64)
+        b = np.array(buckets, dtype=np.int32)
+        order = np.argsort(k, kind="stable")
+
+        k, b = k[order], b[order]
+        if np.array_equal(k, np.arange(len(k))):
+            return cls(None, b)
+        return cls(k, b)
+
+    @classmethod
+    def open(cls, path: str | pathlib.Path) -> Optional[BucketTable]:
+        # None when the table has not been computed
+        keys, buckets = _paths(path)
+        if not buckets.exists():
+            return None
+
+        k = np.load(keys, mmap_mode="r") if keys.exists() else None
+        return cls(k, np.load(buckets, mmap_mode="r"))
+
+    def save(self, path: str | pathlib.Path):
+        keys, buckets = _paths(path)
+        keys.parent.mkdir(parents=True, exist_ok=True)
+        if self.keys is not None:
+            np.save(keys, self.keys)
+        elif keys.exists():
+            keys.unlink()
+        np.save(buckets, self.buckets)
+
+    def get(self, key: int) -> Optional[int]:
+        keys = self.keys
+        if keys is None:
+            return int(self.buckets[key]) if key < len(self.buckets) else None
+
+        i = int(np.searchsorted(keys, key))
+        if i < len(keys) and keys[i] == key:
+            return int(self.buckets[i])
+        return None
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+
+def _paths(path: str | pathlib.Path) -> tuple[pathlib.Path, pathlib.Path]:
+    path = pathlib.Path(path)
+    return (
+        path.with_name(path.name + ".keys.npy"),
+        path.with_name(path.name + ".buckets.npy"),
+    )
+
+
+def bucketing(
+    street: int,
+    n: int,
+    compute: Callable[[tuple[Card, ...], tuple[Card, ...]], int],
+    path: str | pathlib.Path,
+    name: str = "bucketing",
+) -> AlgebraicStateAbstraction:
+    # a card abstraction of `n` buckets on one street, -1 on the others.
+    # buckets are looked up in the table at `path` when it exists and
+    # computed otherwise
+    table = BucketTable.open(path)
+
+    def state(infoset: PInfoSet):
+        infoset = cast(InfoSet, infoset)
+        if len(infoset.community) != street:
+            return -1
+
+        if table is not None:
+            bucket = table.get(key(infoset.hand, infoset.community))
+            if bucket is not None:
+                return bucket
+
+        return compute(infoset.hand, infoset.community)
+
+    state.__name__ = state.__qualname__ = name
+    abstraction = algebraic(state, domain=range(-1, n))
+
+    # what the offline pipeline needs
+    abstraction.street = street  # type: ignore
+    abstraction.compute = compute  # type: ignore
+    abstraction.path = pathlib.Path(path)  # type: ignore
+    abstraction.table = table  # type: ignore
+    return abstraction
@@ -0,0 +1,542 @@
+from numba import njit, prange
+import numpy.typing as npt
+import numpy as np
+
+from typing import Sequence
+
+
+# monte carlo hand strength, equity, potential and made hand distributions,
+# compiled with numba and batched over many hands (one per thread).
+#
+# a set of cards is a 52 bit mask, 13 rank bits per suit, so that hands of any
+# number of cards are evaluated in constant time from lookup tables over 13 bit
+# rank masks. scores only compare with each other, they are not eval7's.
+#
+# boards are completed with the river of blood rule: past the river, cards are
+# dealt for as long as the last one is red. cards are 4 * rank + suit, suits
+# being clubs, diamonds, hearts and spades.
+
+RANKS = 13
+ACCURACY = 100  # opponent hands, or rollouts, behind every sample
+EXACT = 1 << 16  # evaluations up to which outcomes are enumerated, see below
+
+Cards = npt.NDArray[np.int64]
+
+
+def _tops(k: int) -> list[int]:
+    # every rank mask, keeping its `k` highest ranks
+    tops = []
+    for mask in range(1 << RANKS):
+        top, ranks = 0, 0
+        for r in range(RANKS - 1, -1, -1):
+            if mask >> r & 1 and ranks < k:
+                top, ranks = top | 1 << r, ranks + 1
+        tops.append(top)
+    return tops
+
+
+def _straight(mask: int) -> int:
+    # the high card of the best straight as a rank mask, the wheel is 5 high
+    for high in range(RANKS - 1, 3, -1):
+        window = 0b11111 << (high - 4)
+        if mask & window == window:
+            return 1 << high
+
+    wheel = 0b1111 | 1 << (RANKS - 1)
+    return 1 << 3 if mask & wheel == wheel else 0
+
+
+_popcount = np.array([bin(m).count("1") for m in range(1 << RANKS)], dtype=np.int64)
+_top = np.array([_tops(k) for k in range(6)], dtype=np.int64)
+_straights = np.array([_straight(m) for m in range(1 << RANKS)], dtype=np.int64)
+
+# categories, shifted above two 13 bit rank masks
+_STRAIGHT_FLUSH, _QUADS, _FULL_HOUSE, _FLUSH = 8 << 26, 7 << 26, 6 << 26, 5 << 26
+_STRAIGHT, _TRIPS, _TWO_PAIR, _PAIR = 4 << 26, 3 << 26, 2 << 26, 1 << 26
+
+
+@njit(cache=True)
+def evaluate(cards: int) -> int:
+    s0, s1 = cards & 0x1FFF, cards >> 13 & 0x1FFF
+    s2, s3 = cards >> 26 & 0x1FFF, cards >> 39 & 0x1FFF
+    ranks = s0 | s1 | s2 | s3
+
+    flush, straight_flush = 0, 0
+    for suit in (s0, s1, s2, s3):
+        if _popcount[suit] >= 5:
+            flush = max(flush, _top[5, suit])
+            straight_flush = max(straight_flush, _straights[suit])
+
+    if straight_flush:
+        return _STRAIGHT_FLUSH | straight_flush << 13
+
+    quads = s0 & s1 & s2 & s3
+    if quads:
+        q = _top[1, quads]
+        return _QUADS | q << 13 | _top[1, ranks & ~q]
+
+    trips = (s0 & s1 & s2) | (s0 & s1 & s3) | (s0 & s2 & s3) | (s1 & s2 & s3)
+    pairs = (s0 & s1) | (s0 & s2) | (s0 & s3) | (s1 & s2) | (s1 & s3) | (s2 & s3)
+
+    t = _top[1, trips]
+    if trips and pairs & ~t:
+        return _FULL_HOUSE | t << 13 | _top[1, pairs & ~t]
+    if flush:
+        return _FLUSH | flush << 13
+    if _straights[ranks]:
+        return _STRAIGHT | _straights[ranks] << 13
+    if trips:
+        return _TRIPS | t << 13 | _top[2, ranks & ~t]
+
+    if _popcount[pairs] >= 2:
+        p = _top[2, pairs]
+        return _TWO_PAIR | p << 13 | _top[1, ranks & ~p]
+    if pairs:
+        return _PAIR | pairs << 13 | _top[3, ranks & ~pairs]
+    return _top[5, ranks]
+
+
+@njit(cache=True)
+def _bit(card: int) -> int:
+    return 1 << ((card & 3) * RANKS + (card >> 2))
+
+
+@njit(cache=True)
+def _red(card: int) -> bool:
+    return (card & 3) == 1 or (card & 3) == 2
+
+
+@njit(cache=True)
+def _mask(cards: Cards) -> int:
+    mask = 0
+    for card in cards:
+        mask |= _bit(card)
+    return mask
+
+
+@njit(cache=True)
+def _deck(dead: int) -> Cards:
+    deck = np.empty(52 - _popcount_52(dead), dtype=np.int64)
+    n = 0
+    for card in range(52):
+        if not dead & _bit(card):
+            deck[n] = card
+            n += 1
+    return deck
+
+
+@njit(cache=True)
+def _popcount_52(mask: int) -> int:
+    return (
+        _popcount[mask & 0x1FFF]
+        + _popcount[mask >> 13 & 0x1FFF]
+        + _popcount[mask >> 26 & 0x1FFF]
+        + _popcount[mask >> 39 & 0x1FFF]
+    )
+
+
+@njit(cache=True)
+def _draw(deck: Cards, pos: int) -> int:
+    # partial fisher-yates, deck[:pos] has been dealt
+    j = np.random.randint(pos, len(deck))
+    deck[pos], deck[j] = deck[j], deck[pos]
+    return deck[pos]
+
+
+@njit(cache=True)
+def _complete(board: int, n: int, red: bool, deck: Cards, pos: int):
+    # deals the rest of the board, returns it and the next deck position
+    while (n < 5 or red) and pos < len(deck):
+        card = _draw(deck, pos)
+        board |= _bit(card)
+        n, red, pos = n + 1, _red(card), pos + 1
+    return board, pos
+
+
+@njit(cache=True)
+def _future(board: int, n: int, red: bool, deck: Cards, pos: int, k: int):
+    # deals the next `k` cards of the board. the game only goes on past the
+    # river after red cards, so all but the last are red from there
+    for i in range(k):
+        if n >= 5 and not red:
+            break
+
+        if n + 1 >= 5 and i < k - 1:
+            reds = 0
+            for j in range(pos, len(deck)):
+                reds += _red(deck[j])
+            if reds == 0:
+                break
+
+            card = _draw(deck, pos)
+            while not _red(card):
+                card = _draw(deck, pos)
+        else:
+            card = _draw(deck, pos)
+
+        board |= _bit(card)
+        n, red, pos = n + 1, _red(card), pos + 1
+
+    return board, n, red, pos
+
+
+@njit(cache=True)
+def _opponent(deck: Cards, pos: int) -> int:
+    return _bit(_draw(deck, pos)) | _bit(_draw(deck, pos + 1))
+
+
+@njit(cache=True)
+def _score(us: int, op: int) -> int:
+    return 2 if us > op else 1 if us == op else 0
+
+
+@njit(cache=True)
+def _made(hand: int, board: int, deck: Cards, pos: int, accuracy: int) -> float:
+    # strength against random hands, the board as it is
+    us = evaluate(hand | board)
+
+    score = 0
+    for _ in range(accuracy):
+        score += _score(us, evaluate(_opponent(deck, pos) | board))
+    return score / (2 * accuracy)
+
+
+@njit(cache=True)
+def _hs(
+    hand: int, board: int, n: int, red: bool, deck: Cards, pos: int, maxiter: int
+) -> float:
+    # strength against random hands, the board being completed every time
+    score = 0
+    for _ in range(maxiter):
+        completed, p = _complete(board, n, red, deck, pos)
+        us = evaluate(hand | completed)
+        op = evaluate(_opponent(deck, p) | completed)
+        score += _score(us, op)
+    return score / (2 * maxiter)
+
+
+@njit(cache=True)
+def _bin(x: float, d: int) -> int:
+    return min(int(x * d), d - 1)
+
+
+@njit(cache=True)
+def _setup(hand: Cards, board: Cards):
+    h, b = _mask(hand), _mask(board)
+    red = len(board) > 0 and _red(board[-1])
+    return h, b, len(board), red, _deck(h | b)
+
+
+# exact mode. the run makes completing a board an unbounded process, but once
+# it is complete (past the river, the last card black) the showdown only
+# depends on the opponent's holding: every holding is evaluated once and the
+# scores are sorted, so the strength of any hand is counted with a few binary
+# searches. futures of a single card (or not reaching the river) are equally
+# likely and enumerated as well.
+#
+# enumeration replaces sampling when it takes at most `exact` evaluations.
+
+
+@njit(cache=True)
+def _pairs(m: int) -> int:
+    return m * (m - 1) // 2
+
+
+@njit(cache=True)
+def _choose(m: int, k: int) -> int:
+    c = 1
+    for i in range(k):
+        c = c * (m - i) // (i + 1)
+    return c
+
+
+@njit(cache=True)
+def _complete_board(n: int, red: bool) -> bool:
+    return n >= 5 and not red
+
+
+@njit(cache=True)
+def _table(board: int):
+    # sorted scores of every holding on the board, and per card the sorted
+    # scores of the holdings which contain it
+    deck = _deck(board)
+    m = len(deck)
+
+    scores = np.empty(_pairs(m), dtype=np.int64)
+    containing = np.zeros((52, max(m - 1, 0)), dtype=np.int64)
+    counts = np.zeros(52, dtype=np.int64)
+
+    k = 0
+    for i in range(m):
+        for j in range(i + 1, m):
+            a, b = deck[i], deck[j]
+            score = evaluate(board | _bit(a) | _bit(b))
+            scores[k] = score
+            containing[a, counts[a]], containing[b, counts[b]] = score, score
+            k, counts[a], counts[b] = k + 1, counts[a] + 1, counts[b] + 1
+
+    scores.sort()
+    for card in deck:
+        containing[card].sort()
+    return scores, containing
+
+
+@njit(cache=True)
+def _lookup(scores: Cards, containing: Cards, hand: Cards, board: int) -> float:
+    # holdings sharing a card with the hand are not counted, the hand itself
+    # is the only one sharing both
+    a, b = hand[0], hand[1]
+    score = evaluate(_bit(a) | _bit(b) | board)
+
+    below = (
+        np.searchsorted(scores, score)
+        - np.searchsorted(containing[a], score)
+        - np.searchsorted(containing[b], score)
+    )
+    upto = (
+        np.searchsorted(scores, score, side="right")
+        - np.searchsorted(containing[a], score, side="right")
+        - np.searchsorted(containing[b], score, side="right")
+        + 1
+    )
+
+    others = _pairs(len(containing[a]) - 1)
+    return (below + (upto - below) / 2) / others
+
+
+@njit(cache=True)
+def _showdown(hand: Cards, board: int) -> float:
+    # exact strength against every holding, the board as it is
+    scores, containing = _table(board)
+    return _lookup(scores, containing, hand, board)
+
+
+@njit(cache=True)
+def _combination(idx: Cards, m: int) -> bool:
+    # the next combination of range(m) after `idx`, False after the last
+    k = len(idx)
+    i = k - 1
+    while i >= 0 and idx[i] == m - k + i:
+        i -= 1
+    if i < 0:
+        return False
+
+    idx[i] += 1
+    for j in range(i + 1, k):
+        idx[j] = idx[j - 1] + 1
+    return True
+
+
+@njit(cache=True)
+def _futures(n: int, red: bool, m: int, k: int) -> int:
+    # the number of equally likely futures of `k` cards out of `m`, 0 when
+    # they are not (the run constrains the colour of the cards)
+    if _complete_board(n, red):
+        return 1
+    if k == 1 or n + k < 5:
+        return _choose(m, k)
+    return 0
+
+
+@njit(cache=True)
+def _enumerate(b: int, n: int, red: bool, deck: Cards, k: int):
+    # every future board, with its length and the colour of its last card
+    f = _futures(n, red, len(deck), k)
+    boards = np.empty(f, dtype=np.int64)
+    reds = np.empty(f, dtype=np.bool_)
+
+    if _complete_board(n, red):
+        boards[0], reds[0] = b, red
+        return boards, reds, n
+
+    idx = np.arange(k)
+    for i in range(f):
+        board = b
+        for j in idx:
+            board |= _bit(deck[j])
+        boards[i], reds[i] = board, _red(deck[idx[-1]])
+        _combination(idx, len(deck))
+
+    return boards, reds, n + k
+
+
+@njit(parallel=True, cache=True)
+def _strengths(hands: Cards, boards: Cards, maxiter: int, exact: int):
+    # hands sharing a complete board share its table. boards are grouped by
+    # their cards and the colour of their last card, which decides whether
+    # the run goes on
+    n, k = boards.shape
+    keys = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        red = k > 0 and _red(boards[i, -1])
+        keys[i] = _mask(boards[i]) << 1 | red
+
+    order = np.argsort(keys)
+    starts = [0]
+    for r in range(1, n):
+        if keys[order[r]] != keys[order[r - 1]]:
+            starts.append(r)
+    starts.append(n)
+
+    out = np.empty(n)
+    for g in prange(len(starts) - 1):
+        lo, hi = starts[g], starts[g + 1]
+        b, red = keys[order[lo]] >> 1, keys[order[lo]] & 1 == 1
+
+        if _complete_board(k, red) and _pairs(52 - k) <= exact:
+            scores, containing = _table(b)
+            for r in range(lo, hi):
+                out[order[r]] = _lookup(scores, containing, hands[order[r]], b)
+            continue
+
+        for r in range(lo, hi):
+            i = order[r]
+            h = _mask(hands[i])
+            out[i] = _hs(h, b, k, red, _deck(h | b), 0, maxiter)
+
+    return out
+
+
+@njit(parallel=True, cache=True)
+def _equities(
+    hands: Cards, boards: Cards, d: int, maxiter: int, accuracy: int, exact: int
+):
+    out = np.zeros((len(hands), d))
+    for i in prange(len(hands)):
+        h, b, n, red, deck = _setup(hands[i], boards[i])
+
+        # a single completion
+        if _complete_board(n, red) and _pairs(52 - n) <= exact:
+            out[i, _bin(_showdown(hands[i], b), d)] = maxiter
+            continue
+
+        for _ in range(maxiter):
+            completed, pos = _complete(b, n, red, deck, 0)
+            out[i, _bin(_made(h, completed, deck, pos, accuracy), d)] += 1
+    return out / maxiter
+
+
+@njit(parallel=True, cache=True)
+def _potentials(
+    hands: Cards,
+    boards: Cards,
+    d: int,
+    maxiter: int,
+    future: int,
+    accuracy: int,
+    exact: int,
+):
+    out = np.zeros((len(hands), d))
+    for i in prange(len(hands)):
+        h, b, n, red, deck = _setup(hands[i], boards[i])
+
+        f = _futures(n, red, len(deck), future)
+        if 0 < f and f * max(_pairs(52 - n - future), 2 * accuracy) <= exact:
+            futures, reds, fn = _enumerate(b, n, red, deck, future)
+            for fb, fred in zip(futures, reds):
+                if _complete_board(fn, fred):
+                    x = _showdown(hands[i], fb)
+                else:
+                    x = _hs(h, fb, fn, fred, _deck(h | fb), 0, accuracy)
+                out[i, _bin(x, d)] += maxiter / f
+            continue
+
+        for _ in range(maxiter):
+            fb, fn, fred, pos = _future(b, n, red, deck, 0, future)
+            out[i, _bin(_hs(h, fb, fn, fred, deck, pos, accuracy), d)] += 1
+    return out / maxiter
+
+
+@njit(parallel=True, cache=True)
+def _mades(
+    hands: Cards,
+    boards: Cards,
+    d: int,
+    maxiter: int,
+    future: int,
+    accuracy: int,
+    exact: int,
+):
+    out = np.zeros((len(hands), d))
+    for i in prange(len(hands)):
+        h, b, n, red, deck = _setup(hands[i], boards[i])
+
+        f = _futures(n, red, len(deck), future)
+        if 0 < f and f * _pairs(52 - n - future) <= exact:
+            futures, _, _ = _enumerate(b, n, red, deck, future)
+            for fb in futures:
+                out[i, _bin(_showdown(hands[i], fb), d)] += maxiter / f
+            continue
+
+        for _ in range(maxiter):
+            fb, _, _, pos = _future(b, n, red, deck, 0, future)
+            out[i, _bin(_made(h, fb, deck, pos, accuracy), d)] += 1
+    return out / maxiter
+
+
+def cards(hands: Sequence[Sequence[int]]) -> Cards:
+    # a batch of hands of as many cards, as card ids or eval7 cards
+    def card(c) -> int:
+        return int(c) if isinstance(c, (int, np.integer)) else 4 * c.rank + c.suit
+
+    rows = [[card(c) for c in hand] for hand in hands]
+    return np.array(rows, dtype=np.int64).reshape(len(rows), -1)
+
+
+# batches: `hands` is (n, 2) and `boards` is (n, street), see `cards`
+
+
+def hs(
+    hands: Cards, boards: Cards, maxiter: int, exact: int = EXACT
+) -> npt.NDArray[np.float64]:
+    return _strengths(*_batch(hands, boards), maxiter, exact)
+
+
+def equity(
+    hands: Cards,
+    boards: Cards,
+    d: int,
+    maxiter: int,
+    accuracy: int = ACCURACY,
+    exact: int = EXACT,
+) -> npt.NDArray[np.float64]:
+    # histograms of the strength on the completed board
+    return _equities(*_batch(hands, boards), d, maxiter, accuracy, exact)
+
+
+def potential(
+    hands: Cards,
+    boards: Cards,
+    d: int,
+    maxiter: int,
+    future: int,
+    accuracy: int = ACCURACY,
+    exact: int = EXACT,
+) -> npt.NDArray[np.float64]:
+    # histograms of the hand strength `future` cards later
+    return _potentials(*_batch(hands, boards), d, maxiter, future, accuracy, exact)
+
+
+def made(
+    hands: Cards,
+    boards: Cards,
+    d: int,
+    maxiter: int,
+    future: int,
+    accuracy: int = ACCURACY,
+    exact: int = EXACT,
+) -> npt.NDArray[np.float64]:
+    # histograms of the made hand strength `future` cards later
+    return _mades(*_batch(hands, boards), d, maxiter, future, accuracy, exact)
+
+
+def _batch(hands: Cards, boards: Cards) -> tuple[Cards, Cards]:
+    hands = np.ascontiguousarray(hands, dtype=np.int64)
+    boards = np.ascontiguousarray(boards, dtype=np.int64).reshape(len(hands), -1)
+    return hands, boards
+
+
+@njit(cache=True)
+def seed(seed: int):
+    # numba keeps its own generator, per thread
+    np.random.seed(seed)
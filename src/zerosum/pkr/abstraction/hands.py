@@ -8,14 +8,13 @@ import warnings
 import itertools
 import random
 
+from . import engine
+
 
 Card = eval7.Card
 Hand = tuple[Card, ...]
 
 
-ACCURACY = 100
-
-
 def hands(k: int = 2) -> Iterator[tuple[Card, ...]]:
     return itertools.combinations(eval7.Deck().cards, k)
 
@@ -24,51 +23,19 @@ def rhand(k: int):
     return tuple(random.sample(eval7.Deck().cards, k))
 
 
-def _draw(community: tuple[Card, ...], cards: list[Card]):
-    i = 0  # typing
-
-    for i in range(len(cards)):
-        j = random.randint(1 + i, len(cards) - 1)
-        cards[i], cards[j] = cards[j], cards[i]
-
-        if (i >= 1 and len(community) > 0) or i > 1:
-            last = community[-1] if i == 1 else cards[i]
-            if len(community) + i - 1 >= 5 and last.suit not in (1, 2):
-                break
-
-    return tuple(cards[:2]), community + tuple(cards[2 : i + 1])
+# single hand versions of the batched `engine`
 
 
 def hs(hand: tuple[Card, Card], community: tuple[Card, ...], maxiter: int):
-    warnings.warn(
-        "hand strength is implemented with Cython in the eval7 fork, "
-        "this version is python and much slower",
-        category=DeprecationWarning,
-    )
-
-    cards = [
-        card
-        for card in eval7.Deck().cards
-        if card not in hand and card not in community
-    ]
-
-    sco = 0
-    for _ in range(maxiter):
-        other, completion = _draw(community, cards)
-        us = eval7.evaluate(hand + completion)
-        op = eval7.evaluate(other + completion)
-        sco += 2 if us > op else 1 if us == op else 0
-
-    return sco / (2 * maxiter)
+    return float(engine.hs(engine.cards([hand]), engine.cards([community]), maxiter)[0])
 
 
 def equity(hand: tuple[Card, Card], community: tuple[Card, ...], d: int, maxiter: int):
     if maxiter < 20:
         warnings.warn(f"low monte carlo accuracy: {maxiter}")
 
-    s = eval7.hequity(hand, community, maxiter, ACCURACY)
-    h, _ = np.histogram(s, bins=d, range=(0, 1))
-    return h / h.sum()
+    h = engine.equity(engine.cards([hand]), engine.cards([community]), d, maxiter)
+    return h[0]
 
 
 def potential(
@@ -81,20 +48,8 @@ def potential(
     if maxiter < 20:
         warnings.warn(f"low monte carlo accuracy: {maxiter}")
 
-    cards = [
-        card
-        for card in eval7.Deck().cards
-        if card not in hand and card not in community
-    ]
-
-    dist = []
-    for _ in range(maxiter):
-        additional = tuple(random.sample(cards, k=future))
-        strength = eval7.strength(hand, community + additional, ACCURACY)
-        dist.append(strength)
-
-    hist, _ = np.histogram(dist, bins=np.linspace(0, 1, d + 1), range=(0, 1))
-    return hist / hist.sum()
+    hands, boards = engine.cards([hand]), engine.cards([community])
+    return engine.potential(hands, boards, d, maxiter, future)[0]
 
 
 def made(
@@ -107,20 +62,8 @@ def made(
     if maxiter < 20:
         warnings.warn(f"low monte carlo accuracy: {maxiter}")
 
-    cards = [
-        card
-        for card in eval7.Deck().cards
-        if card not in hand and card not in community
-    ]
-
-    dist = []
-    for _ in range(maxiter):
-        additional = tuple(random.sample(cards, k=future))
-        strength = eval7.made(hand, community + additional, 100)
-        dist.append(strength)
-
-    hist, _ = np.histogram(dist, bins=np.linspace(0, 1, d + 1), range=(0, 1))
-    return hist / hist.sum()
+    hands, boards = engine.cards([hand]), engine.cards([community])
+    return engine.made(hands, boards, d, maxiter, future)[0]
 
 
 @njit
@@ -133,3 +76,39 @@ def emd(h1: npt.NDArray[np.float64], h2: npt.NDArray[np.float64]) -> float:
         carry = v1 + carry - v2
 
     return d
+
+
+# in one dimension, the earth mover's distance between two histograms is the
+# L1 distance between their cumulative histograms (the last bin, where both
+# sum to 1, excepted). centroids are therefore compared as precomputed cdfs
+
+
+def cdfs(centroids: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    centroids = np.asarray(centroids, dtype=np.float64)
+    return np.ascontiguousarray(np.cumsum(centroids, axis=1)[:, :-1])
+
+
+@njit(cache=True)
+def nearest(
+    h: npt.NDArray[np.float64], cdfs: npt.NDArray[np.float64]
+) -> tuple[int, float]:
+    # the centroid closest to `h` in emd, and the distance to it
+    n, d = cdfs.shape
+
+    cdf = np.empty(d)
+    acc = 0.0
+    for k in range(d):
+        acc += h[k]
+        cdf[k] = acc
+
+    best, distance = 0, np.inf
+    for i in range(n):
+        dist = 0.0
+        for k in range(d):
+            dist += abs(cdf[k] - cdfs[i, k])
+            if dist >= distance:
+                break
+        else:
+            best, distance = i, dist
+
+    return best, distance
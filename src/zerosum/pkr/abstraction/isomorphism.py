@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from typing import Sequence
+from functools import lru_cache
+import itertools
+import bisect
+import math
+
+
+# dense indexing of (hole cards, board) up to the suit permutations which
+# preserve colours, after Waugh's hand isomorphism
+# https://www.cs.cmu.edu/~kwaugh/publications/isomorphism13.pdf
+#
+# the showdown only depends on the board as a set, and the run rule on the
+# colour of the last board card. two situations are therefore the same when
+# they only differ by swapping clubs and spades, or diamonds and hearts, or
+# in the order of the board but for the colour of its last card.
+#
+# every suit is described by its configuration, the number of hole and board
+# cards of that suit, and by which ranks these are. both swaps act
+# independently, so each pair of suits of a colour is made canonical on its
+# own by putting the larger configuration first. indices are laid out by
+# configuration, then by black suits, then by red suits.
+#
+# cards are indexed as 4 * rank + suit, suits being clubs, diamonds, hearts
+# and spades.
+
+RANKS = 13
+_colours = ((0, 3), (1, 2))  # black then red suits
+
+
+def _red(card: int) -> bool:
+    return card % 4 in (1, 2)
+
+
+def _rank(ranks: Sequence[int]) -> int:
+    # colex rank of a sorted set
+    return sum(math.comb(r, i + 1) for i, r in enumerate(ranks))
+
+
+def _unrank(index: int, k: int) -> list[int]:
+    ranks = []
+    for i in range(k, 0, -1):
+        r = i - 1
+        while math.comb(r + 1, i) <= index:
+            r += 1
+        ranks.append(r)
+        index -= math.comb(r, i)
+    return ranks[::-1]
+
+
+_comb = [[math.comb(n, k) for k in range(RANKS + 1)] for n in range(RANKS + 1)]
+
+
+def _suit_size(config: tuple[int, int]) -> int:
+    h, b = config
+    return _comb[RANKS][h] * _comb[RANKS - h][b]
+
+
+# colex rank of every 13 bit rank set, among the sets of its size
+_colex = [
+    _rank([r for r in range(RANKS) if mask >> r & 1]) for mask in range(1 << RANKS)
+]
+_popcount = [bin(mask).count("1") for mask in range(1 << RANKS)]
+
+
+def _suit_index(hole: int, board: int) -> int:
+    # from rank masks ; the board ranks are ranked among the ranks not in the
+    # hole, so the hole bits are squeezed out of the board mask
+    compressed, h = board, hole
+    while h:
+        r = h.bit_length() - 1
+        low = (1 << r) - 1
+        compressed = compressed & low | (compressed >> (r + 1)) << r
+        h ^= 1 << r
+
+    n = RANKS - _popcount[hole]
+    return _colex[hole] * _comb[n][_popcount[board]] + _colex[compressed]
+
+
+def _suit_unindex(
+    index: int, config: tuple[int, int]
+) -> tuple[list[int], list[int]]:
+    h, b = config
+    hole, board = divmod(index, math.comb(RANKS - h, b))
+
+    hole_ranks = _unrank(hole, h)
+    rest = [r for r in range(RANKS) if r not in hole_ranks]
+    return hole_ranks, [rest[i] for i in _unrank(board, b)]
+
+
+def _pair_size(configs: tuple[tuple[int, int], tuple[int, int]]) -> int:
+    a, b = configs
+    if a == b:
+        n = _suit_size(a)
+        return n * (n + 1) // 2
+    return _suit_size(a) * _suit_size(b)
+
+
+def _splits(n: int, parts: int) -> list[tuple[int, ...]]:
+    return [
+        split
+        for split in itertools.product(range(n + 1), repeat=parts)
+        if sum(split) == n
+    ]
+
+
+class HandIndexer:
+    def __init__(self, board: int, hole: int = 2):
+        self.board, self.hole = board, hole
+
+        # a configuration is (last card is red, black suits, red suits)
+        configs = set()
+        for holes, boards in itertools.product(_splits(hole, 4), _splits(board, 4)):
+            if any(h + b > RANKS for h, b in zip(holes, boards)):
+                continue
+
+            suits = list(zip(holes, boards))
+            pairs = tuple(
+                tuple(sorted((suits[s], suits[t]), reverse=True)) for s, t in _colours
+            )
+
+            for last in (False, True) if board >= 5 else (False,):
+                if self._reachable(last, pairs):
+                    configs.add((last, *pairs))
+
+        self._configs = sorted(configs)
+        self._offsets, size = [], 0
+        for last, black, red in self._configs:
+            self._offsets.append(size)
+            size += _pair_size(black) * _pair_size(red)
+
+        self._ids = {config: i for i, config in enumerate(self._configs)}
+        self._sizes = [_pair_size(red) for _, _, red in self._configs]
+        self.size = size
+
+    def _reachable(self, last: bool, pairs: tuple) -> bool:
+        if self.board < 5:
+            return True
+
+        # the cards dealt after the river and before the last one are red
+        black, red = (sum(b for _, b in pair) for pair in pairs)
+        return red >= self.board - 5 + last and black >= 1 - last
+
+    def __len__(self) -> int:
+        return self.size
+
+    def index(self, hand: Sequence[int], board: Sequence[int]) -> int:
+        if len(hand) != self.hole or len(board) != self.board:
+            raise ValueError(f"expected {self.hole} hole and {self.board} board cards")
+        cards = (*hand, *board)
+        if len(set(cards)) != len(cards) or not all(0 <= c < 52 for c in cards):
+            raise ValueError(f"cards must be distinct and in 0..51, not {cards}")
+        # the run only goes on after a red card, from the river on
+        if not all(_red(card) for card in board[4:-1]):
+            raise ValueError(f"{tuple(board)} goes on after a black river card")
+
+        holes, boards = [0, 0, 0, 0], [0, 0, 0, 0]
+        for card in hand:
+            holes[card & 3] |= 1 << (card >> 2)
+        for card in board:
+            boards[card & 3] |= 1 << (card >> 2)
+
+        last = self.board >= 5 and _red(board[-1])
+
+        configs, indices = [], []
+        for s, t in _colours:
+            hs, bs, ht, bt = holes[s], boards[s], holes[t], boards[t]
+            a = ((_popcount[hs], _popcount[bs]), _suit_index(hs, bs))
+            b = ((_popcount[ht], _popcount[bt]), _suit_index(ht, bt))
+            (ca, ia), (cb, ib) = (a, b) if a >= b else (b, a)
+
+            configs.append((ca, cb))
+            if ca == cb:
+                indices.append(ia * (ia + 1) // 2 + ib)
+            else:
+                indices.append(ia * _suit_size(cb) + ib)
+
+        config = self._ids[(last, *configs)]
+        return self._offsets[config] + indices[0] * self._sizes[config] + indices[1]
+
+    def unindex(self, index: int) -> tuple[tuple[int, ...], tuple[int, ...]]:
+        # a representative of the index, its board being in dealing order
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+
+        config = bisect.bisect_right(self._offsets, index) - 1
+        last, *pairs = self._configs[config]
+        index -= self._offsets[config]
+
+        black, red = divmod(index, _pair_size(pairs[1]))
+
+        hand, board = [], []
+        for (s, t), (ca, cb), i in zip(_colours, pairs, (black, red)):
+            if ca == cb:
+                ia = int((math.isqrt(8 * i + 1) - 1) // 2)
+                ib = i - ia * (ia + 1) // 2
+            else:
+                ia, ib = divmod(i, _suit_size(cb))
+
+            for suit, c, j in ((s, ca, ia), (t, cb, ib)):
+                hole_ranks, board_ranks = _suit_unindex(j, c)
+                hand += [4 * r + suit for r in hole_ranks]
+                board += [4 * r + suit for r in board_ranks]
+
+        return tuple(sorted(hand)), self._order(board, last)
+
+    def _order(self, board: list[int], last: bool) -> tuple[int, ...]:
+        if self.board < 5:
+            return tuple(sorted(board))
+
+        # the last card has the right colour, the run before it is red
+        reds = sorted(card for card in board if _red(card))
+        blacks = sorted(card for card in board if not _red(card))
+
+        final = reds.pop() if last else blacks.pop()
+        run = reds[len(reds) - (self.board - 5) :]
+        rest = sorted(blacks + reds[: len(reds) - (self.board - 5)])
+        return (*rest, *run, final)
+
+
+@lru_cache(maxsize=None)
+def indexer(board: int) -> HandIndexer:
+    return HandIndexer(board)
+
+
+def index(hand: Sequence[int], board: Sequence[int]) -> int:
+    return indexer(len(board)).index(hand, board)
+
+
+def unindex(board: int, index: int) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    return indexer(board).unindex(index)
@@ -1,7 +1,7 @@
 from numba import njit
 import numpy as np
 
-from typing import Callable
+from typing import Callable, Iterable, Iterator, Optional
 
 from .hands import emd
 
@@ -9,27 +9,13 @@ from .hands import emd
 Metric = Callable[[np.ndarray, np.ndarray], float]
 
 
-def kmeanspp(vecs, k: int, metric: Metric = emd):
-    centroids = []
-    for _ in range(k):
-        mi, md = 0, 0
-        for i in np.random.choice(len(vecs), k, replace=False):
-            if len(centroids) == 0:
-                mi = i
-                break
+@njit
+def l2(a: np.ndarray, b: np.ndarray) -> float:
+    return np.sqrt(np.sum((a - b) ** 2))
 
-            ix = np.random.choice(len(centroids), min(len(centroids), 1000))
-            d = min(metric(vecs[i], centroids[c]) for c in ix)
-            if d > md:
-                mi, md = i, d
 
-        centroids.append(vecs[mi])
-    return np.asarray(centroids)
-
-
-# @njit
-# can't njit because of metric argument, but this is fixable
 def _pdist(vecs, centroids, metric):
+    # any other metric, one call per pair
     k, _ = centroids.shape
     n, _ = vecs.shape
 
@@ -46,7 +32,7 @@ def _labels(vecs, centroids, metric):
     return np.argmin(dists, axis=1)
 
 
-def kmeans(vecs, centroids, maxiter: int, metric: Metric = emd):
+def _lloyd(vecs, centroids, maxiter: int, metric: Metric):
     k, _ = centroids.shape
     old = None
 
@@ -62,3 +48,246 @@ def kmeans(vecs, centroids, maxiter: int, metric: Metric = emd):
                 centroids[j] = members.mean(axis=0)
 
     return centroids, _labels(vecs, centroids, metric)
+
+
+# the built-in metrics run Hamerly's accelerated k-means, compiled: every point
+# keeps an upper bound on the distance to its centroid and a lower bound on the
+# distance to any other, so that most distances are never computed. emd is the
+# L1 distance between cumulative histograms, in which centroids still are means.
+#
+# https://epubs.siam.org/doi/pdf/10.1137/1.9781611972801.12
+
+L1, L2 = 1, 2
+
+
+@njit(cache=True)
+def _distance(a: np.ndarray, b: np.ndarray, p: int) -> float:
+    d = 0.0
+    if p == L1:
+        for i in range(len(a)):
+            d += abs(a[i] - b[i])
+        return d
+
+    for i in range(len(a)):
+        d += (a[i] - b[i]) ** 2
+    return np.sqrt(d)
+
+
+@njit(cache=True)
+def _scan(x: np.ndarray, centroids: np.ndarray, p: int):
+    # the closest centroid, its distance and the distance to the second closest
+    best, first, second = 0, np.inf, np.inf
+    for j in range(len(centroids)):
+        d = _distance(x, centroids[j], p)
+        if d < first:
+            best, first, second = j, d, first
+        elif d < second:
+            second = d
+    return best, first, second
+
+
+@njit(cache=True)
+def _assign(vecs, centroids, labels, upper, lower, p: int) -> int:
+    # updates labels and bounds, returns how many labels changed
+    k = len(centroids)
+
+    half = np.full(k, np.inf)  # half the distance to the closest other centroid
+    for j in range(k):
+        for jj in range(j + 1, k):
+            d = _distance(centroids[j], centroids[jj], p) / 2
+            half[j], half[jj] = min(half[j], d), min(half[jj], d)
+
+    changed = 0
+    for i in range(len(vecs)):
+        bound = max(half[labels[i]], lower[i])
+        if upper[i] <= bound:
+            continue
+
+        upper[i] = _distance(vecs[i], centroids[labels[i]], p)
+        if upper[i] <= bound:
+            continue
+
+        best, upper[i], lower[i] = _scan(vecs[i], centroids, p)
+        if best != labels[i]:
+            labels[i] = best
+            changed += 1
+
+    return changed
+
+
+@njit(cache=True)
+def _hamerly(vecs, centroids, maxiter: int, p: int):
+    n, d = vecs.shape
+    k = len(centroids)
+
+    labels = np.empty(n, dtype=np.int64)
+    upper, lower = np.empty(n), np.empty(n)
+    for i in range(n):
+        labels[i], upper[i], lower[i] = _scan(vecs[i], centroids, p)
+
+    for it in range(maxiter):
+        if it > 0 and _assign(vecs, centroids, labels, upper, lower, p) == 0:
+            break
+
+        sums, counts = np.zeros((k, d)), np.zeros(k)
+        for i in range(n):
+            sums[labels[i]] += vecs[i]
+            counts[labels[i]] += 1
+
+        moved = np.zeros(k)
+        for j in range(k):
+            if counts[j]:
+                mean = sums[j] / counts[j]
+                moved[j] = _distance(mean, centroids[j], p)
+                centroids[j] = mean
+
+        # the bounds follow the centroids
+        furthest = moved.max()
+        for i in range(n):
+            upper[i] += moved[labels[i]]
+            lower[i] -= furthest
+    else:
+        _assign(vecs, centroids, labels, upper, lower, p)
+
+    return centroids, labels
+
+
+# k-means++ seeding: every next centroid is drawn with probability
+# proportional to the squared distance to the closest centroid so far. the
+# distances to the closest centroid are kept, and updated with one pass over
+# the vectors per new centroid.
+#
+# http://ilpubs.stanford.edu:8090/778/1/2006-13.pdf
+
+
+@njit(cache=True)
+def _closer(vecs, centroid, closest, p: int):
+    for i in range(len(vecs)):
+        closest[i] = min(closest[i], _distance(vecs[i], centroid, p))
+
+
+def kmeanspp(
+    vecs, k: int, metric: Metric = emd, rng: Optional[np.random.Generator] = None
+):
+    vecs = np.asarray(vecs, dtype=np.float64)
+    n = len(vecs)
+    rng = rng if rng is not None else np.random.default_rng()
+
+    if metric is emd:
+        space, p = _cdfs(vecs), L1
+    else:
+        space, p = vecs, L2
+
+    def closer(centroid: int, closest: np.ndarray):
+        if metric is emd or metric is l2:
+            _closer(space, space[centroid], closest, p)
+        else:
+            d = np.array([metric(v, vecs[centroid]) for v in vecs])
+            np.minimum(closest, d, out=closest)
+
+    chosen = [int(rng.integers(n))]
+    closest = np.full(n, np.inf)
+    closer(chosen[0], closest)
+
+    for _ in range(1, k):
+        weights = np.cumsum(closest**2)
+        if weights[-1] > 0:
+            i = int(np.searchsorted(weights, rng.random() * weights[-1], "right"))
+        else:
+            i = int(rng.integers(n))  # fewer distinct vectors than centroids
+
+        chosen.append(min(i, n - 1))
+        closer(chosen[-1], closest)
+
+    return vecs[chosen].copy()
+
+
+def _cdfs(vecs) -> np.ndarray:
+    return np.cumsum(vecs, axis=1, dtype=np.float64)[:, :-1]
+
+
+def kmeans(vecs, centroids, maxiter: int, metric: Metric = emd):
+    if metric is not emd and metric is not l2:
+        return _lloyd(vecs, centroids, maxiter, metric)
+
+    vecs = np.asarray(vecs, dtype=np.float64)
+    if metric is l2:
+        c, labels = _hamerly(vecs, centroids.astype(np.float64), maxiter, L2)
+        centroids[:] = c
+        return centroids, labels
+
+    # on cumulative histograms, without their last bin. the total of each
+    # centroid is that of its vectors on average, histograms need not sum to 1
+    c, labels = _hamerly(_cdfs(vecs), _cdfs(centroids), maxiter, L1)
+
+    k = len(c)
+    counts = np.bincount(labels, minlength=k)
+    totals = np.bincount(labels, weights=vecs.sum(axis=1), minlength=k)
+    totals = np.where(counts > 0, totals / np.maximum(counts, 1), centroids.sum(axis=1))
+
+    cdfs = np.hstack((np.zeros((k, 1)), c, totals[:, None]))
+    centroids[:] = np.diff(cdfs, axis=1)
+    return centroids, labels
+
+
+# mini-batch k-means, for more vectors than fit in memory. centroids are
+# updated from one chunk of vectors at a time, each moving towards the points
+# assigned to it at a rate of one over their number so far. chunks should come
+# in random order, as sampled hands do.
+#
+# https://www.eecs.tufts.edu/~dsculley/papers/fastkmeans.pdf
+
+
+def chunks(vecs, size: int) -> Iterator[np.ndarray]:
+    # consecutive chunks of an array or memmap, loaded one at a time
+    for i in range(0, len(vecs), size):
+        yield np.asarray(vecs[i : i + size], dtype=np.float64)
+
+
+@njit(cache=True)
+def _scans(vecs, centroids, p: int):
+    labels = np.empty(len(vecs), dtype=np.int64)
+    for i in range(len(vecs)):
+        labels[i], _, _ = _scan(vecs[i], centroids, p)
+    return labels
+
+
+def _nearest(vecs, centroids, metric: Metric):
+    if metric is emd:
+        return _scans(_cdfs(vecs), _cdfs(centroids), L1)
+    if metric is l2:
+        return _scans(vecs, centroids, L2)
+    return _labels(vecs, centroids, metric)
+
+
+@njit(cache=True)
+def _update(vecs, labels, centroids, counts):
+    for i in range(len(vecs)):
+        j = labels[i]
+        counts[j] += 1
+        centroids[j] += (vecs[i] - centroids[j]) / counts[j]
+
+
+def minibatch(
+    chunks: Iterable[np.ndarray],
+    centroids,
+    metric: Metric = emd,
+    counts=None,
+):
+    # one pass over the chunks. `counts`, the points seen per centroid, carries
+    # the rates over to further passes
+    c = np.array(centroids, dtype=np.float64)
+    counts = np.zeros(len(c)) if counts is None else counts
+
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.float64)
+        _update(chunk, _nearest(chunk, c, metric), c, counts)
+
+    centroids[:] = c
+    return centroids
+
+
+def assign(chunks: Iterable[np.ndarray], centroids, metric: Metric = emd):
+    # the final assignment pass, labels of every vector in order
+    labels = [_nearest(np.asarray(chunk), centroids, metric) for chunk in chunks]
+    return np.concatenate(labels).astype(np.int32)
@@ -2,32 +2,35 @@ import numpy as np
 import eval7
 
 from collections import defaultdict
+from functools import lru_cache
 from itertools import combinations
 
-from blood.basic import preflop
-from ..game import RiverOfBlood, Draw
+from blood.basic import preflops
 
 
 Card = eval7.Card
 _cards = eval7.Deck().cards
 
 
-label = {}
+@lru_cache(maxsize=None)
+def _villains() -> list[tuple[tuple[Card, Card], ...]]:
+    # hole card pairs by preflop bucket, the buckets in order of appearance
+    clusters = defaultdict(list)
+    for (i, j), bucket in zip(combinations(range(52), 2), preflops()):
+        clusters[bucket].append((_cards[i], _cards[j]))
 
-for i, j in combinations(range(52), 2):
-    g = RiverOfBlood().apply(Draw((i, j))).apply(Draw((i, j)))
-    iset = g.infoset(g.active)
-    label[i, j] = preflop(iset)
+    return list(map(tuple, clusters.values()))
 
-clusters = defaultdict(list)
-for (i, j), l in label.items():
-    clusters[l].append((_cards[i], _cards[j]))
 
-villains = list(map(tuple, clusters.values()))
-del clusters, label
+def __getattr__(name: str):
+    # `villains` is only built when first used
+    if name == "villains":
+        return _villains()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def ochs(hand: tuple[Card, Card], community: tuple[Card, ...]):
+    villains = _villains()
     hist = np.empty(len(villains))
     for i, cluster in enumerate(villains):
         strength = 0
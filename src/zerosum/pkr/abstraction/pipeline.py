@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from tqdm import tqdm
+import numpy.typing as npt
+import numpy as np
+import numba
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional
+import pathlib
+import os
+import random
+
+from .kmeans import Metric, kmeanspp, kmeans, minibatch, assign, chunks
+from .hands import emd
+from . import engine
+
+
+# the clustering pipeline of the scripts. features are generated by a pool of
+# processes, in chunks drawn with their own seeds, and written to a .npy
+# memmap as they come in. an interrupted run resumes with the chunks left, and
+# features can be clustered again without generating them.
+
+Generate = Callable[[random.Random, int], npt.NDArray[np.float64]]
+
+CHUNK = 1024
+SEEDS = 100_000  # vectors k-means++ seeds from
+MEMORY = 4_000_000  # vectors clustered in memory, mini-batches beyond
+
+
+def deals(rng: random.Random, street: int, size: int) -> npt.NDArray[np.int64]:
+    # random hands and boards, as rows of card ids
+    rows = [rng.sample(range(52), 2 + street) for _ in range(size)]
+    return np.array(rows, dtype=np.int64).reshape(size, 2 + street)
+
+
+def _seed(seed: int, chunk: int) -> int:
+    return int(np.random.SeedSequence([seed, chunk]).generate_state(1)[0])
+
+
+def _init():
+    # one process per core already
+    numba.set_num_threads(1)
+
+
+def _generate(generate: Generate, seed: int, size: int):
+    np.random.seed(seed)
+    engine.seed(seed)
+    return generate(random.Random(seed), size)
+
+
+def _save(path: pathlib.Path, array: np.ndarray):
+    # atomically, a run killed while saving keeps the previous version
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def features(
+    path: str | pathlib.Path,
+    n: int,
+    dimension: int,
+    generate: Generate,
+    workers: Optional[int] = None,
+    seed: int = 0,
+    chunk: int = CHUNK,
+) -> np.memmap:
+    # `generate(rng, size)` must be picklable (a module function or partial)
+    path = pathlib.Path(path)
+    progress = path.with_name(path.name + ".done.npy")
+    count = -(-n // chunk)
+
+    if path.exists():
+        vecs = np.lib.format.open_memmap(path, mode="r+")
+        if vecs.shape != (n, dimension):
+            shape = (n, dimension)
+            raise ValueError(f"{path} holds {vecs.shape} features, not {shape}")
+        # the sidecar is written before the features, and removed once they
+        # are all generated
+        done = np.load(progress) if progress.exists() else np.ones(count, dtype=bool)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        done = np.zeros(count, dtype=bool)
+        _save(progress, done)
+
+        shape = (n, dimension)
+        vecs = np.lib.format.open_memmap(path, "w+", dtype=np.float64, shape=shape)
+
+    todo = np.flatnonzero(~done)
+    with ProcessPoolExecutor(workers, initializer=_init) as pool:
+        futures = {
+            pool.submit(
+                _generate, generate, _seed(seed, j), min(chunk, n - j * chunk)
+            ): j
+            for j in todo
+        }
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc=path.name):
+            j = futures[future]
+            vecs[j * chunk : (j + 1) * chunk] = future.result()
+            vecs.flush()
+
+            done[j] = True
+            _save(progress, done)
+
+    progress.unlink(missing_ok=True)
+    return vecs
+
+
+def cluster(
+    vecs,
+    clusters: int,
+    metric: Metric = emd,
+    maxiter: int = 1000,
+    minimum: int = 10,
+    epochs: int = 3,
+    seed: int = 0,
+):
+    # k-means++ seeds from a sample, then k-means over every vector, in
+    # mini-batches past `MEMORY` vectors. clusters of at most `minimum` vectors
+    # are dropped and the others clustered again. the same `seed` gives the
+    # same centroids
+    n = len(vecs)
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(n, min(n, SEEDS), replace=False))
+    centroids = kmeanspp(vecs[sample], clusters, metric, rng)
+
+    data = np.asarray(vecs) if n <= MEMORY else None
+    while True:
+        if data is not None:
+            centroids, labels = kmeans(data, centroids, maxiter, metric)
+        else:
+            counts = np.zeros(len(centroids))
+            for _ in range(epochs):
+                minibatch(chunks(vecs, 16 * CHUNK), centroids, metric, counts)
+            labels = assign(chunks(vecs, 16 * CHUNK), centroids, metric)
+
+        keep = np.bincount(labels, minlength=len(centroids)) > minimum
+        if keep.all():
+            return centroids
+        centroids = centroids[keep]
@@ -1,8 +1,10 @@
 import eval7
 
 from typing import cast
-from typing import ClassVar
+from typing import ClassVar, Iterator, Sequence
+from typing import Optional, overload
 from dataclasses import dataclass
+from functools import lru_cache
 import itertools
 import random
 import math
@@ -13,6 +15,57 @@ from ..game import Player, Game
 Card = int
 _cards = eval7.Deck().cards
 _ix_cards = list(range(52))
+_deck = (1 << 52) - 1
+
+# suit permutations which preserve colours: clubs <-> spades and diamonds <->
+# hearts. red cards continue the run so a red suit is never swapped with a
+# black one. cards are indexed as 4 * rank + suit
+_suits = ((0, 1, 2, 3), (3, 1, 2, 0), (0, 2, 1, 3), (3, 2, 1, 0))
+_permutations = tuple(
+    tuple(card - card % 4 + suits[card % 4] for card in _ix_cards)
+    for suits in _suits
+)
+
+
+@lru_cache(maxsize=128)
+def _orbits(dead: int, k: int, group: tuple[int, ...]) -> tuple:
+    # one representative of every k live cards up to the suit permutations of
+    # `group` (which leave `dead` unchanged), with the size of its orbit. the
+    # representative has the lowest mask of its orbit. a flop takes ~0.2s and
+    # ~1.5MB (17296 combinations, ~10k orbits), hence the small cache
+    permutations = [_permutations[g] for g in group]
+    orbits = []
+    for cards in itertools.combinations(_live(dead), k):
+        images = {sum(1 << p[card] for card in cards) for p in permutations}
+        if min(images) == sum(1 << card for card in cards):
+            orbits.append((cards, len(images)))
+    return tuple(orbits)
+
+
+def _live(dead: int) -> Iterator[Card]:
+    # the cards which are not dealt yet, in increasing order
+    live = _deck & ~dead
+    while live:
+        low = live & -live
+        yield low.bit_length() - 1
+        live ^= low
+
+
+def _deal(dead: int, k: int) -> tuple[Card, ...]:
+    # rejection sampling takes less than 2 draws per card on average while at
+    # most half of the cards are dead. runs go on for as long as red cards
+    # come, so long boards can leave far fewer live cards: those are then
+    # sampled directly
+    if dead.bit_count() > 26:
+        return tuple(random.sample(list(_live(dead)), k))
+
+    cards: list[Card] = []
+    while len(cards) < k:
+        card = int(random.random() * 52)
+        if not dead >> card & 1:
+            dead |= 1 << card
+            cards.append(card)
+    return tuple(cards)
 
 
 @dataclass(slots=True, frozen=True)
@@ -85,11 +138,75 @@ class Run(_Reveal):
     ...
 
 
+# single card reveals are immutable, so they are built once
+_turns = tuple(Turn((card,)) for card in _ix_cards)
+_rivers = tuple(River((card,)) for card in _ix_cards)
+_runs = tuple(Run((card,)) for card in _ix_cards)
+
+
 _Action = Draw | Fold | Call | Check | Bet | Flop | Turn | River | Run
 _PseudoAction = Allin | RaisePot | Raise75Pot | RaiseHalfPot
 Action = _Action | _PseudoAction
 
 
+@dataclass(slots=True, frozen=True)
+class ActionSpace(Sequence[Action]):
+    # `head` followed by every `Bet(lb)` ... `Bet(ub)`. the bets are only built
+    # when they are accessed, there can be hundreds of them
+    head: tuple[Action, ...]
+    lb: int
+    ub: int
+
+    def __len__(self) -> int:
+        return len(self.head) + self.ub - self.lb + 1
+
+    @overload
+    def __getitem__(self, i: int) -> Action:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> tuple[Action, ...]:
+        ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(len(self))))
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+
+        if i < len(self.head):
+            return self.head[i]
+        return Bet(self.lb + i - len(self.head))
+
+    def __contains__(self, action: object) -> bool:
+        if isinstance(action, Bet):
+            return self.lb <= action.bet <= self.ub
+        return action in self.head
+
+    def __iter__(self) -> Iterator[Action]:
+        yield from self.head
+        for bet in range(self.lb, self.ub + 1):
+            yield Bet(bet)
+
+    def index(self, action: object, start: int = 0, stop: Optional[int] = None) -> int:
+        if isinstance(action, Bet) and action in self:
+            i = len(self.head) + action.bet - self.lb
+        elif action in self.head:
+            i = self.head.index(action)
+        else:
+            raise ValueError(action)
+
+        if i < start or stop is not None and i >= stop:
+            raise ValueError(action)
+        return i
+
+    def count(self, action: object) -> int:
+        return int(action in self)
+
+
 @dataclass(slots=True, frozen=True)
 class InfoSet:
     hand: tuple[Card, Card]
@@ -112,13 +229,11 @@ class InfoSet:
         minbound = min(maxbound, cost + max(cost, 2))
         return minbound, maxbound
 
-    def _bets(self):
-        # TODO: bottleneck
+    def _bets(self, actions: tuple[Action, ...]) -> "ActionSpace":
         lb, ub = self._bounds()
-        yield Allin()
         if lb <= self.pot + sum(self.pips) <= ub:
-            yield RaisePot()
-        yield from (Bet(bet) for bet in range(lb, ub + 1))
+            return ActionSpace((*actions, Allin(), RaisePot()), lb, ub)
+        return ActionSpace((*actions, Allin()), lb, ub)
 
     def _non_bet_actions(self):
         player = self.player
@@ -136,10 +251,10 @@ class InfoSet:
             return (Fold(), Call()), True
         return (Fold(), Call()), False
 
-    def actions(self):
+    def actions(self) -> Sequence[Action]:
         actions, bets = self._non_bet_actions()
         if bets:
-            return (*actions, *self._bets())
+            return self._bets(actions)
         return actions
 
 
@@ -155,9 +270,24 @@ class RiverOfBlood:
     pips: tuple[int, int] = (1, 2)
     pot: int = 0
 
+    # bit `i` is set when card `i` has been dealt
+    dead: int = 0
+
+    # when set, `chances()` only yields one representative per class of
+    # outcomes equivalent under the colour preserving suit permutations which
+    # fix the cards already dealt, with the total probability of its class.
+    # this is exact as long as infosets cannot tell suits of the same colour
+    # apart, which is the case of every card abstraction (buckets).
+    #
+    # only full traversals (`CFR`, `CFRP`, `TreeCFR`) call `chances()`, and
+    # few states have a non-trivial symmetry: on random deals, the first hand
+    # (1326 -> 507 outcomes), the second one 74% of the time, the flop 12%
+    # (17296 -> ~10k), the turn 1% and later cards less often still
+    isomorphic: bool = False
+
     @classmethod
-    def default(cls):
-        return cls()
+    def default(cls, isomorphic: bool = False):
+        return cls(isomorphic=isomorphic)
 
     @property
     def _street(self):
@@ -230,67 +360,68 @@ class RiverOfBlood:
         return False
 
     def chances(self) -> dict[Action, float]:
-        if len(self.history) == 0:
-            # TODO: bottleneck
-            return {
-                Draw(hand): 1 / math.comb(52, 2)
-                for hand in itertools.combinations(_ix_cards, 2)
-            }
-
-        elif len(self.history) == 1:
-            hand = cast(Draw, self.history[0])
-            deck = [card for card in _ix_cards if card not in hand.hand]
-            # TODO: bottleneck
-            return {
-                Draw(hand): 1 / math.comb(50, 2)
-                for hand in itertools.combinations(deck, 2)
-            }
-
-        seen = (
-            self.community
-            + cast(Draw, self.history[0]).hand
-            + cast(Draw, self.history[1]).hand
+        if not self.isomorphic:
+            return self._chances()
+
+        group = self._symmetries()
+        if len(group) == 1:
+            return self._chances()
+
+        # every outcome is as likely, a class weighs as many of them as it has
+        n = 52 - self.dead.bit_count()
+        street = self._street
+        if len(self.history) <= 1 or street == 0:
+            kind, k = (Draw, 2) if len(self.history) <= 1 else (Flop, 3)
+            total = math.comb(n, k)
+            orbits = _orbits(self.dead, k, group)
+            return {kind(cards): size / total for cards, size in orbits}
+
+        reveals = _turns if street == 3 else _rivers if street == 4 else _runs
+        chances: dict[Action, float] = {}
+        for card in _live(self.dead):
+            images = {_permutations[g][card] for g in group}
+            if min(images) == card:
+                chances[reveals[card]] = len(images) / n
+        return chances
+
+    def _symmetries(self) -> tuple[int, ...]:
+        # the suit permutations which leave the state unchanged, as indices in
+        # `_suits`
+        hands = [set(cast(Draw, action).hand) for action in self.history[:2]]
+        flop, rest = set(self.community[:3]), self.community[3:]
+
+        return tuple(
+            g
+            for g, permutation in enumerate(_permutations)
+            if all({permutation[card] for card in hand} == hand for hand in hands)
+            and {permutation[card] for card in flop} == flop
+            and all(permutation[card] == card for card in rest)
         )
-        deck = [card for card in _ix_cards if card not in seen]
+
+    def _chances(self) -> dict[Action, float]:
+        live = _live(self.dead)
+        n = 52 - self.dead.bit_count()
+
+        if len(self.history) <= 1:
+            p = 1 / math.comb(n, 2)
+            return {Draw(hand): p for hand in itertools.combinations(live, 2)}
 
         street = self._street
         if street == 0:
-            # TODO: bottleneck
-            return {
-                Flop(cards): 1 / math.comb(48, 3)
-                for cards in itertools.combinations(deck, 3)
-            }
-        elif street == 3:
-            return {Turn((card,)): 1 / len(deck) for card in deck}
-        elif street == 4:
-            return {River((card,)): 1 / len(deck) for card in deck}
-        else:
-            return {Run((card,)): 1 / len(deck) for card in deck}
+            p = 1 / math.comb(n, 3)
+            return {Flop(cards): p for cards in itertools.combinations(live, 3)}
+        reveals = _turns if street == 3 else _rivers if street == 4 else _runs
+        return {reveals[card]: 1 / n for card in live}
 
     def sample(self):
-        if len(self.history) == 0:
-            return Draw(tuple(random.sample(_ix_cards, 2)))
-        elif len(self.history) == 1:
-            hand = cast(Draw, self.history[0])
-            deck = [card for card in _ix_cards if card not in hand.hand]
-            return Draw(tuple(random.sample(deck, 2)))
-
-        seen = (
-            self.community
-            + cast(Draw, self.history[0]).hand
-            + cast(Draw, self.history[1]).hand
-        )
-        deck = [card for card in _ix_cards if card not in seen]
-
         street = self._street
-        if street == 0:
-            return Flop(tuple(random.sample(deck, 3)))
-        elif street == 3:
-            return Turn(tuple(random.sample(deck, 1)))
-        elif street == 4:
-            return River(tuple(random.sample(deck, 1)))
-        else:
-            return Run(tuple(random.sample(deck, 1)))
+        if len(self.history) <= 1:
+            return Draw(_deal(self.dead, 2))
+        elif street == 0:
+            return Flop(_deal(self.dead, 3))
+
+        reveals = _turns if street == 3 else _rivers if street == 4 else _runs
+        return reveals[_deal(self.dead, 1)[0]]
 
     def _bounds(self):
         player = self.active
@@ -309,8 +440,16 @@ class RiverOfBlood:
         stacks = self.stacks
         pips = self.pips
         pot = self.pot
+        dead = self.dead
+
+        if isinstance(action, Draw):
+            for card in action.hand:
+                dead |= 1 << card
+
+        elif isinstance(action, _Reveal):
+            for card in action.cards:
+                dead |= 1 << card
 
-        if isinstance(action, _Reveal):
             community = community + action.cards
             player = cast(Player, 1)
             stacks = (stacks[0] - pips[0], stacks[1] - pips[1])
@@ -343,7 +482,14 @@ class RiverOfBlood:
             )
 
         return self.__class__(
-            self.history + (action,), community, player, stacks, pips, pot
+            self.history + (action,),
+            community,
+            player,
+            stacks,
+            pips,
+            pot,
+            dead,
+            self.isomorphic,
         )
 
     def infoset(self, player: Player) -> InfoSet: